@@ -1,10 +1,11 @@
 from tkinter import *
-from tkinter import ttk, messagebox
-import sqlite3
-
-# DB Connection
-def get_connection():
-    return sqlite3.connect("students.db")
+from tkinter import messagebox
+import repository
+from reports import card_from_row, render_report_card
+from database import DB_NAME, transaction
+from widgets import PagedTreeview, SearchBox
+from search import search_students
+from tasks import TaskRunner
 
 # --------------------------
 # ADMIN DASHBOARD WINDOW
@@ -20,90 +21,125 @@ def admin_dashboard():
                   font=("Arial", 20, "bold"), bg="white")
     title.pack(pady=10)
 
+    # DB work runs off the Tk thread; results come back through runner callbacks
+    status = Label(admin_win, text="Ready", anchor="w", bg="white")
+    status.pack(side=BOTTOM, fill=X, padx=10)
+    runner = TaskRunner(admin_win, on_busy=lambda n: status.config(
+        text=f"Working... ({n} pending)" if n else "Ready"))
+    admin_win.bind("<Destroy>", lambda e: runner.shutdown() if e.widget is admin_win else None)
+
     # --------------------------
     # TREEVIEW TABLE
     # --------------------------
-    columns = ("id", "name", "s1", "s2", "s3", "total", "percentage", "grade")
-    table = ttk.Treeview(admin_win, columns=columns, show='headings')
+    repository.init(DB_NAME)
+    # one column per subject, as of opening the window (Refresh does not add new subjects)
+    subjects = repository.get_subjects(DB_NAME)
+    subject_ids = [sid for sid, _ in subjects]
+    names = [name for _, name in subjects]
+    n = len(subjects)
+    columns = ("roll", "name", *(f"s{sid}" for sid in subject_ids), "total", "percentage", "grade")
+    headings = ("ROLL", "NAME", *names, "TOTAL", "PERCENTAGE", "GRADE")
+
+    def shown(rows):
+        # repository.result_row() rows (pivoted in SQL) -> this table's columns; "" for no mark
+        return [(r[0], r[1], *("" if m is None else m for m in r[3:3 + n]), *r[3 + n:6 + n]) for r in rows]
+
+    def fetch_page(after=None, before=None, limit=200):
+        return shown(repository.result_page(subject_ids, after, before, limit, DB_NAME))
+
+    def fetch_rows(rolls):
+        return shown(repository.result_rows(rolls, subject_ids, DB_NAME))
+
+    def search(text):
+        # search-as-you-type by name; empty box goes back to paging
+        if text:
+            view.set_filter(lambda limit: fetch_rows(
+                [r for r, in search_students(text, ("roll",), limit=limit, db=DB_NAME)]))
+        else:
+            view.set_filter(None)
+
+    SearchBox(admin_win, search).pack(fill=X, padx=10)
+
+    view = PagedTreeview(admin_win, columns, fetch_page, runner=runner)
+    table = view.tree
 
-    for col in columns:
-        table.heading(col, text=col.upper())
+    for col, text in zip(columns, headings):
+        table.heading(col, text=text)
 
-    table.pack(fill=BOTH, expand=True, pady=10)
+    view.pack(fill=BOTH, expand=True, pady=10)
 
     # --------------------------
     # FETCH STUDENTS
     # --------------------------
     def load_data():
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM students")
-        rows = cur.fetchall()
-        table.delete(*table.get_children())
-        for r in rows:
-            table.insert("", END, values=r)
-        conn.close()
+        # re-fetch only the visible page
+        view.refresh()
 
     load_data()
+    # pick up writes from other windows/processes (PRAGMA data_version);
+    # the caches are cleared before the page is re-read
+    view.watch(lambda: repository.sync_caches(DB_NAME))
 
     # --------------------------
     # ADD STUDENT
     # --------------------------
+    def mark_entries(win, old=None):
+        # one labelled Entry per subject
+        entries = []
+        for i, name in enumerate(names):
+            Label(win, text=name).pack()
+            entry = Entry(win)
+            if old is not None:
+                entry.insert(0, old[i])
+            entry.pack()
+            entries.append(entry)
+        return entries
+
+    def read_marks(entries):
+        # [(subject_id, marks), ...], or None after telling the user what is wrong
+        try:
+            return [(sid, repository.check_marks(int(e.get().strip())))
+                    for sid, e in zip(subject_ids, entries)]
+        except ValueError:
+            messagebox.showerror("Error", "Marks must be whole numbers from 0 to 100")
+            return None
+
     def add_student():
         def save_student():
             name = name_entry.get()
-            s1 = s1_entry.get()
-            s2 = s2_entry.get()
-            s3 = s3_entry.get()
+            values = [e.get() for e in entries]
 
-            if name == "" or s1 == "" or s2 == "" or s3 == "":
+            if name == "" or "" in values:
                 messagebox.showerror("Error", "All fields required")
                 return
+            marks = read_marks(entries)
+            if marks is None:
+                return
 
-            s1, s2, s3 = int(s1), int(s2), int(s3)
-            total = s1 + s2 + s3
-            percentage = total / 3
-
-            if percentage >= 75:
-                grade = "A"
-            elif percentage >= 60:
-                grade = "B"
-            elif percentage >= 50:
-                grade = "C"
-            elif percentage >= 35:
-                grade = "D"
-            else:
-                grade = "F"
-
-            conn = get_connection()
-            cur = conn.cursor()
-            cur.execute("INSERT INTO students(name, s1, s2, s3, total, percentage, grade) VALUES(?,?,?,?,?,?,?)",
-                        (name, s1, s2, s3, total, percentage, grade))
-            conn.commit()
-            conn.close()
-            load_data()
-            add_win.destroy()
-            messagebox.showinfo("Success", "Student added successfully")
+            def work():
+                # the roll is numbered automatically; student and marks in one transaction
+                with transaction(DB_NAME):
+                    roll = repository.next_roll(DB_NAME)
+                    repository.add_students([(roll, name, "")], DB_NAME)
+                    repository.save_marks([(roll, marks)], DB_NAME)
+                return fetch_rows([roll])[0]
+
+            def done(row):
+                view.upsert_row(row)
+                add_win.destroy()
+                messagebox.showinfo("Success", "Student added successfully")
+
+            runner.submit(work, on_done=done)
 
         add_win = Toplevel(admin_win)
         add_win.title("Add Student")
-        add_win.geometry("300x300")
+        add_win.geometry(f"300x{120 + 45 * n}")
 
         Label(add_win, text="Name").pack()
         name_entry = Entry(add_win)
         name_entry.pack()
 
-        Label(add_win, text="Subject 1").pack()
-        s1_entry = Entry(add_win)
-        s1_entry.pack()
-
-        Label(add_win, text="Subject 2").pack()
-        s2_entry = Entry(add_win)
-        s2_entry.pack()
-
-        Label(add_win, text="Subject 3").pack()
-        s3_entry = Entry(add_win)
-        s3_entry.pack()
+        entries = mark_entries(add_win)
 
         Button(add_win, text="Save", command=save_student).pack(pady=10)
 
@@ -117,57 +153,34 @@ def admin_dashboard():
             return
 
         values = table.item(selected, "values")
-        sid, name_old, old1, old2, old3, total_old, pct_old, grade_old = values
+        old = values[2:2 + n]
+        roll = selected  # item iid is the roll
 
         def save_update():
-            s1 = int(s1_entry.get())
-            s2 = int(s2_entry.get())
-            s3 = int(s3_entry.get())
-
-            total = s1 + s2 + s3
-            percentage = total / 3
-
-            if percentage >= 75:
-                grade = "A"
-            elif percentage >= 60:
-                grade = "B"
-            elif percentage >= 50:
-                grade = "C"
-            elif percentage >= 35:
-                grade = "D"
-            else:
-                grade = "F"
+            values = [e.get() for e in entries]
+            if "" in values:
+                messagebox.showerror("Error", "All fields required")
+                return
+            marks = read_marks(entries)
+            if marks is None:
+                return
 
-            conn = get_connection()
-            cur = conn.cursor()
-            cur.execute("""
-                UPDATE students SET s1=?, s2=?, s3=?, total=?, percentage=?, grade=? WHERE id=?
-            """, (s1, s2, s3, total, percentage, grade, sid))
-            conn.commit()
-            conn.close()
+            def work():
+                repository.save_marks([(roll, marks)], DB_NAME)
+                return fetch_rows([roll])[0]
 
-            load_data()
-            upd_win.destroy()
-            messagebox.showinfo("Updated", "Student marks updated")
+            def done(row):
+                view.upsert_row(row)
+                upd_win.destroy()
+                messagebox.showinfo("Updated", "Student marks updated")
+
+            runner.submit(work, on_done=done)
 
         upd_win = Toplevel(admin_win)
         upd_win.title("Update Marks")
-        upd_win.geometry("300x250")
-
-        Label(upd_win, text="Subject 1").pack()
-        s1_entry = Entry(upd_win)
-        s1_entry.insert(0, old1)
-        s1_entry.pack()
+        upd_win.geometry(f"300x{70 + 45 * n}")
 
-        Label(upd_win, text="Subject 2").pack()
-        s2_entry = Entry(upd_win)
-        s2_entry.insert(0, old2)
-        s2_entry.pack()
-
-        Label(upd_win, text="Subject 3").pack()
-        s3_entry = Entry(upd_win)
-        s3_entry.insert(0, old3)
-        s3_entry.pack()
+        entries = mark_entries(upd_win, old)
 
         Button(upd_win, text="Update", command=save_update).pack(pady=10)
 
@@ -180,18 +193,18 @@ def admin_dashboard():
             messagebox.showwarning("Select", "Select a student")
             return
 
-        sid = table.item(selected, "values")[0]
+        roll = selected  # item iid is the roll
 
         confirm = messagebox.askyesno("Confirm", "Delete this student?")
         if confirm:
-            conn = get_connection()
-            cur = conn.cursor()
-            cur.execute("DELETE FROM students WHERE id=?", (sid,))
-            conn.commit()
-            conn.close()
-            load_data()
-            messagebox.showinfo("Deleted", "Student deleted")
-    from reportlab.pdfgen import canvas
+            def work():
+                repository.delete_students([roll], DB_NAME, missing_ok=True)
+
+            def done(_):
+                view.remove_row(roll)
+                messagebox.showinfo("Deleted", "Student deleted")
+
+            runner.submit(work, on_done=done)
 
     def export_pdf():
         selected = table.focus()
@@ -199,28 +212,22 @@ def admin_dashboard():
             messagebox.showwarning("Select", "Select a student to export PDF")
             return
 
-        values = table.item(selected, "values")
-        sid, name, s1, s2, s3, total, percentage, grade = values
-
-        file_name = f"{name}_result.pdf"
-        c = canvas.Canvas(file_name)
-
-        c.setFont("Helvetica-Bold", 18)
-        c.drawString(200, 800, "Student Result")
-
-        c.setFont("Helvetica", 12)
-        c.drawString(50, 760, f"ID: {sid}")
-        c.drawString(50, 740, f"Name: {name}")
-        c.drawString(50, 720, f"Subject 1: {s1}")
-        c.drawString(50, 700, f"Subject 2: {s2}")
-        c.drawString(50, 680, f"Subject 3: {s3}")
-        c.drawString(50, 660, f"Total: {total}")
-        c.drawString(50, 640, f"Percentage: {percentage}")
-        c.drawString(50, 620, f"Grade: {grade}")
-
-        c.save()
+        def work():
+            # fetch and render on the worker thread; returns the file name, or None without marks
+            row = repository.result_row(selected, subject_ids, DB_NAME)
+            if row is None or row[-4] is None:
+                return None
+            file_name = f"{row[1]}_result.pdf"
+            render_report_card(card_from_row(names, row), file_name)
+            return file_name
+
+        def done(file_name):
+            if file_name is None:
+                messagebox.showwarning("No marks", "This student has no marks yet")
+            else:
+                messagebox.showinfo("Success", f"PDF saved as {file_name}")
 
-        messagebox.showinfo("Success", f"PDF saved as {file_name}")
+        runner.submit(work, on_done=done)
 
     # --------------------------
     # BUTTONS
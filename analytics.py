@@ -0,0 +1,106 @@
+"""
+Class-wide statistics: mean, median, standard deviation, percentiles,
+histogram and pass rate per course and per subject.
+
+Per course the values are the stored percentages (mark_results), per
+subject the marks themselves (marks joined to subjects).
+
+Each report is one SQL query ordered by (group, value). The cursor is read
+once; each group's values go into a compact array and are summarized when
+the group ends (NumPy when installed, pure Python otherwise).
+"""
+
+from array import array
+from itertools import groupby
+from math import sqrt
+
+from database import DB_NAME, get_connection
+from grading import PASS_MARK
+from migrations import grading_policy
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+PERCENTILES = (10, 25, 50, 75, 90)
+BINS = 10   # histogram buckets of 10 marks: 0-9, 10-19, ..., 90-100
+
+QUERIES = {
+    "course": """
+        SELECT s.course, r.percentage FROM mark_results r JOIN students s ON s.roll = r.roll
+        ORDER BY s.course, r.percentage
+    """,
+    "subject": """
+        SELECT sb.name, m.marks FROM marks m JOIN subjects sb ON sb.id = m.subject_id
+        ORDER BY sb.name, m.marks
+    """,
+}
+
+
+def _percentile(sorted_values, p):
+    # linear interpolation, same as numpy's default
+    pos = (len(sorted_values) - 1) * p / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def summarize(values, pass_mark=PASS_MARK):
+    """Stats for one group. `values` must be sorted ascending."""
+    n = len(values)
+    if np is not None:
+        v = np.frombuffer(values, dtype=np.float64) if isinstance(values, array) else np.asarray(values, float)
+        mean = float(v.mean())
+        std = float(v.std())
+        pct = [float(x) for x in np.percentile(v, PERCENTILES)]
+        hist = np.bincount(np.minimum(v // 10, BINS - 1).astype(int), minlength=BINS).tolist()
+        passed = int(n - np.searchsorted(v, pass_mark, side="left"))
+    else:
+        mean = sum(values) / n
+        std = sqrt(sum((x - mean) ** 2 for x in values) / n)
+        pct = [_percentile(values, p) for p in PERCENTILES]
+        hist = [0] * BINS
+        for x in values:
+            hist[min(int(x // 10), BINS - 1)] += 1
+        passed = sum(1 for x in values if x >= pass_mark)
+    return {
+        "count": n,
+        "mean": mean,
+        "median": pct[PERCENTILES.index(50)],
+        "stddev": std,
+        "min": values[0],
+        "max": values[-1],
+        "percentiles": dict(zip(PERCENTILES, pct)),
+        "histogram": hist,
+        "pass_rate": passed / n,
+    }
+
+
+def group_stats(by="course", db=DB_NAME, pass_mark=None):
+    """{group: stats} for `by` in ("course", "subject"), in group order.
+    The pass rate uses the stored pass mark unless `pass_mark` is given."""
+    conn = get_connection(db)
+    if pass_mark is None:
+        pass_mark = grading_policy(conn)[1]
+    cur = conn.execute(QUERIES[by])
+    stats = {}
+    for group, rows in groupby(cur, key=lambda r: r[0]):
+        values = array("d", (v for _, v in rows))
+        stats[group] = summarize(values, pass_mark)
+    return stats
+
+
+def histogram_labels():
+    return [f"{i * 10}-{i * 10 + 9}" if i < BINS - 1 else f"{i * 10}-100" for i in range(BINS)]
+
+
+def format_stats(stats, by="course"):
+    # plain-text table for the CLI
+    header = f"{by.capitalize():<16}{'N':>7}{'Mean':>8}{'Median':>8}{'StdDev':>8}{'P25':>7}{'P75':>7}{'P90':>7}{'Pass%':>7}"
+    lines = [header, "-" * len(header)]
+    for group, s in stats.items():
+        p = s["percentiles"]
+        lines.append(f"{str(group)[:15]:<16}{s['count']:>7}{s['mean']:>8.2f}{s['median']:>8.2f}{s['stddev']:>8.2f}"
+                     f"{p[25]:>7.1f}{p[75]:>7.1f}{p[90]:>7.1f}{s['pass_rate'] * 100:>7.1f}")
+    return "\n".join(lines)
@@ -1,42 +1,101 @@
-from database import setup_database, get_connection
+import argparse
+import csv
+import json
+import os
+import sys
+from itertools import islice
+
+import repository
+from database import DB_NAME, setup_database, retrying
+from analytics import format_stats, group_stats
+from ranking import LEADERBOARD_COLUMNS, rank_of, top_n
+from grading import calculate, format_policy
+
+
+PAGE_SIZE = 20  # rows per page in the interactive listings
+DB = DB_NAME    # every call below uses this file
 
 
 def calculate_result(s1, s2, s3):
-    total = s1 + s2 + s3
-    percentage = total / 3
-    if percentage >= 75:
-        grade = "A"
-    elif percentage >= 60:
-        grade = "B"
-    elif percentage >= 50:
-        grade = "C"
-    elif percentage >= 35:
-        grade = "D"
-    else:
-        grade = "F"
+    return calculate((s1, s2, s3))
+
+
+def parse_int(text, min_value=None, max_value=None):
+    # Same rules as input_int, but raises ValueError instead of re-prompting
+    try:
+        value = int(str(text).strip())
+    except ValueError:
+        raise ValueError("Please enter a valid integer.") from None
+    if min_value is not None and value < min_value:
+        raise ValueError(f"Value must be >= {min_value}")
+    if max_value is not None and value > max_value:
+        raise ValueError(f"Value must be <= {max_value}")
+    return value
+
+
+# ---------- Batch operations (one transaction per call) ----------
+# The interactive menu and the command-line subcommands both use these.
+# Each raises ValueError and writes nothing if any record is invalid.
+
+@retrying
+def insert_students(records):
+    # records: [(roll, name, course), ...]
+    for roll, name, course in records:
+        if not name or not course:
+            raise ValueError(f"Roll {roll}: Name and Course cannot be empty.")
+    return repository.add_students(records, DB)
+
 
-    status = "PASS" if percentage >= 35 else "FAIL"
-    return total, percentage, grade, status
+@retrying
+def save_marks(records):
+    # records: [(roll, marks, ...), ...] with one mark per subject, in subject order
+    ids = [sid for sid, _ in repository.get_subjects(DB)]
+    for roll, *marks in records:
+        if len(marks) != len(ids):
+            raise ValueError(f"Roll {roll}: expected {len(ids)} marks (one per subject), got {len(marks)}")
+    return repository.save_marks([(roll, list(zip(ids, marks))) for roll, *marks in records], DB)
+
+
+@retrying
+def delete_students(rolls):
+    return repository.delete_students(rolls, DB)
+
+
+@retrying
+def regrade_results(boundaries=None, pass_mark=None):
+    # store a new grading policy and re-grade every stored result with it
+    return repository.regrade(boundaries, pass_mark, DB)
+
+
+def result_columns():
+    # names for fetch_result() rows: one column per subject
+    return repository.result_columns(db=DB)
+
+
+def fetch_result(roll):
+    # one student with their result (marks columns are None if not entered); None if no such roll
+    return repository.result_row(roll, db=DB)
 
 
 def input_int(prompt, min_value=None, max_value=None):
     while True:
         try:
-            value = int(input(prompt))
-            if min_value is not None and value < min_value:
-                print(f"Value must be >= {min_value}")
-                continue
-            if max_value is not None and value > max_value:
-                print(f"Value must be <= {max_value}")
-                continue
-            return value
-        except ValueError:
-            print("Please enter a valid integer.")
+            return parse_int(input(prompt), min_value, max_value)
+        except ValueError as e:
+            print(e)
+
+
+def input_roll(prompt):
+    while True:
+        try:
+            return parse_roll(input(prompt))
+        except ValueError as e:
+            print(e)
 
 
 def add_student():
     print("\n--- ADD STUDENT ---")
-    roll = input_int("Enter Roll Number: ", min_value=1)
+    roll = input_roll("Enter Roll Number: ")
     name = input("Enter Student Name: ").strip()
     course = input("Enter Course: ").strip()
 
@@ -44,153 +103,170 @@ def add_student():
         print("Name and Course cannot be empty.\n")
         return
 
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        # Check if roll already exists
-        cursor.execute("SELECT 1 FROM students WHERE roll = ?", (roll,))
-        if cursor.fetchone():
-            print("Roll number already exists.\n")
-            return
-
-        cursor.execute(
-            "INSERT INTO students (roll, name, course) VALUES (?, ?, ?)",
-            (roll, name, course),
-        )
-        conn.commit()
+    try:
+        insert_students([(roll, name, course)])
+    except ValueError:
+        print("Roll number already exists.\n")
+        return
     print("Student Added Successfully!\n")
 
 
 def add_or_update_marks():
     print("\n--- ADD / UPDATE MARKS ---")
-    roll = input_int("Enter Roll Number: ", min_value=1)
-
-    s1 = input_int("Enter Subject 1 Marks (0-100): ", 0, 100)
-    s2 = input_int("Enter Subject 2 Marks (0-100): ", 0, 100)
-    s3 = input_int("Enter Subject 3 Marks (0-100): ", 0, 100)
-
-    total, percentage, grade, status = calculate_result(s1, s2, s3)
+    roll = input_roll("Enter Roll Number: ")
 
-    with get_connection() as conn:
-        cursor = conn.cursor()
-
-        # Ensure student exists
-        cursor.execute("SELECT 1 FROM students WHERE roll = ?", (roll,))
-        if not cursor.fetchone():
-            print("Student not found. Add the student first.\n")
-            return
+    marks = [input_int(f"Enter {name} Marks (0-100): ", 0, 100) for _, name in repository.get_subjects(DB)]
 
-        cursor.execute("""
-            INSERT INTO results (roll, subject1, subject2, subject3, total, percentage, grade, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(roll) DO UPDATE SET
-                subject1=excluded.subject1,
-                subject2=excluded.subject2,
-                subject3=excluded.subject3,
-                total=excluded.total,
-                percentage=excluded.percentage,
-                grade=excluded.grade,
-                status=excluded.status
-        """, (roll, s1, s2, s3, total, percentage, grade, status))
-
-        conn.commit()
+    try:
+        save_marks([(roll, *marks)])
+    except ValueError:
+        print("Student not found. Add the student first.\n")
+        return
 
     print("Marks Saved Successfully!\n")
 
 
 def view_result():
     print("\n--- VIEW RESULT ---")
-    roll = input_int("Enter Roll Number to View Result: ", min_value=1)
-
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT s.roll, s.name, s.course,
-                   r.subject1, r.subject2, r.subject3,
-                   r.total, r.percentage, r.grade, r.status
-            FROM students s
-            LEFT JOIN results r ON s.roll = r.roll
-            WHERE s.roll = ?
-        """, (roll,))
-        row = cursor.fetchone()
+    roll = input_roll("Enter Roll Number to View Result: ")
+
+    row = fetch_result(roll)
 
     if row:
         print("\n--- STUDENT RESULT ---")
-        print("Roll Number :", row[0])
-        print("Name        :", row[1])
-        print("Course      :", row[2])
-
-        if row[3] is None:
-            print("Marks       : Not entered yet.\n")
-        else:
-            print("Marks       :", row[3], row[4], row[5])
-            print("Total       :", row[6])
-            print("Percentage  :", round(row[7], 2), "%")
-            print("Grade       :", row[8])
-            print("Status      :", row[9], "\n")
+        print_result(row)
     else:
         print("Record Not Found!\n")
 
 
-def list_all_students():
-    print("\n--- ALL STUDENTS ---")
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT roll, name, course FROM students ORDER BY roll")
-        rows = cursor.fetchall()
+def query_students(course=None, limit=None, offset=0):
+    return repository.query_students(course, limit, offset, DB)
 
-    if not rows:
-        print("No students found.\n")
-        return
 
-    for r in rows:
-        print(f"Roll: {r[0]} | Name: {r[1]} | Course: {r[2]}")
-    print()
-
-
-def list_results_summary():
-    print("\n--- RESULTS SUMMARY (TOP TO LOW) ---")
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT s.roll, s.name, s.course,
-                   r.total, r.percentage, r.grade, r.status
-            FROM students s
-            JOIN results r ON s.roll = r.roll
-            ORDER BY r.percentage DESC
-        """)
-        rows = cursor.fetchall()
-
-    if not rows:
-        print("No results found.\n")
+def query_results(course=None, grade=None, status=None, limit=None, offset=0):
+    return repository.query_results(course, grade, status, limit, offset, DB)
+
+
+def print_rows(cursor, fmt, out=None, batch_size=500, page_size=None):
+    """Stream cursor rows to `out` in fetchmany batches, one write per batch.
+
+    With page_size, pause for Enter after each page (q stops). Returns
+    the number of rows printed.
+    """
+    out = out or sys.stdout
+    batch_size = page_size or batch_size
+    count = 0
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        out.write("".join(fmt(r) + "\n" for r in rows))
+        out.flush()
+        count += len(rows)
+        if page_size and len(rows) == page_size:
+            if input("-- Enter for more, q to stop -- ").strip().lower() == "q":
+                break
+    cursor.close()
+    return count
+
+
+def write_records(rows, columns, output, out=None, batch_size=500):
+    """Stream rows (a cursor or any iterable) as "json" (an array of objects) or "csv"."""
+    out = out or sys.stdout
+    rows = iter(rows)
+    count = 0
+    if output == "csv":
+        writer = csv.writer(out)
+        writer.writerow(columns)
+    else:
+        out.write("[")
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        if output == "csv":
+            writer.writerows(batch)
+        else:
+            out.write(",".join("\n  " + json.dumps(dict(zip(columns, r))) for r in batch))
+        out.flush()
+        count += len(batch)
+    if output != "csv":
+        out.write("\n]\n" if count else "]\n")
+    return count
+
+
+def format_student(r):
+    return f"Roll: {r[0]} | Name: {r[1]} | Course: {r[2]}"
+
+
+def format_result(r):
+    return (f"Roll: {r[0]} | Name: {r[1]} | Course: {r[2]} | "
+            f"Total: {r[3]} | %: {round(r[4], 2)} | Grade: {r[5]} | Status: {r[6]}")
+
+
+def format_wide(names):
+    # formatter for result_table() rows: marks per subject between course and total
+    def fmt(r):
+        marks = " ".join(f"{n}: {'-' if m is None else m}" for n, m in zip(names, r[3:-4]))
+        return (f"Roll: {r[0]} | Name: {r[1]} | Course: {r[2]} | {marks} | "
+                f"Total: {r[-4]} | %: {round(r[-3], 2)} | Grade: {r[-2]} | Status: {r[-1]}")
+    return fmt
+
+
+def format_change(c):
+    key = "".join(f" {k} {c[k]}" for k in ("roll", "subject_id") if c[k] is not None)
+    return (f"#{c['seq']} {c['at']} {c['actor']} {c['op']} {c['table']}{key}: "
+            f"{json.dumps(c['old'])} -> {json.dumps(c['new'])}")
+
+
+def list_all_students(course=None, limit=None, offset=0, page_size=None, out=None, output="text"):
+    cursor = query_students(course, limit, offset)
+    if output != "text":
+        write_records(cursor, ("roll", "name", "course"), output, out)
         return
+    print("\n--- ALL STUDENTS ---", file=out)
+    if not print_rows(cursor, format_student, out, page_size=page_size):
+        print("No students found.\n", file=out)
+        return
+    print(file=out)
+
 
-    for r in rows:
-        print(
-            f"Roll: {r[0]} | Name: {r[1]} | Course: {r[2]} | "
-            f"Total: {r[3]} | %: {round(r[4], 2)} | Grade: {r[5]} | Status: {r[6]}"
-        )
-    print()
+def list_results_summary(course=None, grade=None, status=None, limit=None, offset=0, page_size=None,
+                         out=None, output="text", wide=False):
+    # wide: marks for every subject too (repository.result_table), one query for the whole class
+    if wide:
+        columns = result_columns()
+        cursor = repository.result_table(course, grade, status, limit, offset, db=DB)
+        fmt = format_wide(columns[3:-4])
+    else:
+        columns = repository.RESULT_SUMMARY_COLUMNS
+        cursor = query_results(course, grade, status, limit, offset)
+        fmt = format_result
+    if output != "text":
+        write_records(cursor, columns, output, out)
+        return
+    print("\n--- RESULTS SUMMARY (TOP TO LOW) ---", file=out)
+    if not print_rows(cursor, fmt, out, page_size=page_size):
+        print("No results found.\n", file=out)
+        return
+    print(file=out)
 
 
 def delete_student():
     print("\n--- DELETE STUDENT ---")
-    roll = input_int("Enter Roll Number to Delete: ", min_value=1)
-
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM students WHERE roll = ?", (roll,))
-        if not cursor.fetchone():
-            print("Student not found.\n")
-            return
+    roll = input_roll("Enter Roll Number to Delete: ")
 
-        cursor.execute("DELETE FROM students WHERE roll = ?", (roll,))
-        conn.commit()
+    try:
+        delete_students([roll])
+    except ValueError:
+        print("Student not found.\n")
+        return
 
     print("Student and related results deleted.\n")
 
 
 def menu():
-    setup_database()
+    setup_database(DB)
 
     while True:
         print("=== STUDENT RESULT MANAGER ===")
@@ -211,9 +287,9 @@ def menu():
         elif choice == 3:
             view_result()
         elif choice == 4:
-            list_all_students()
+            list_all_students(page_size=PAGE_SIZE)
         elif choice == 5:
-            list_results_summary()
+            list_results_summary(page_size=PAGE_SIZE)
         elif choice == 6:
             delete_student()
         elif choice == 7:
@@ -221,5 +297,259 @@ def menu():
             break
 
 
+# ---------- Command line ----------
+def read_records(values, path, width):
+    """Records from the command line (one) or a CSV file ("-" = stdin, many).
+
+    A header row starting with "roll" is skipped; blank lines are ignored.
+    """
+    if path is None:
+        if not values:
+            return []
+        groups = [values[i:i + width] for i in range(0, len(values), width)] if width > 1 else [[v] for v in values]
+    else:
+        f = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8-sig")
+        try:
+            groups = [row for row in csv.reader(f) if row and any(c.strip() for c in row)]
+        finally:
+            if f is not sys.stdin:
+                f.close()
+        if groups and groups[0][0].strip().lower() == "roll":
+            groups = groups[1:]
+    for i, rec in enumerate(groups, 1):
+        if len(rec) != width:
+            raise ValueError(f"record {i}: expected {width} value(s), got {len(rec)}")
+    return [[c.strip() for c in rec] for rec in groups]
+
+
+def parse_roll(text):
+    # rolls are text in the database ("007" stays "007"); only surrounding blanks go
+    roll = str(text).strip()
+    if not roll:
+        raise ValueError("Roll number cannot be empty.")
+    return roll
+
+
+def parse_percentage(text):
+    try:
+        value = float(str(text).strip())
+    except ValueError:
+        raise ValueError(f"{text!r} is not a percentage") from None
+    return int(value) if value.is_integer() else value
+
+
+def parse_boundaries(text):
+    # "75:A,60:B,50:C,35:D" -> ((75, "A"), (60, "B"), ...); grading.check_policy validates the rest
+    boundaries = []
+    for item in str(text).split(","):
+        threshold, sep, grade = item.partition(":")
+        if not sep:
+            raise ValueError(f"grade boundary {item.strip()!r}: expected PERCENT:GRADE")
+        boundaries.append((parse_percentage(threshold), grade.strip()))
+    return boundaries
+
+
+def parse_marks_record(rec):
+    roll = parse_roll(rec[0])
+    try:
+        return (roll, *(parse_int(m, 0, 100) for m in rec[1:]))
+    except ValueError as e:
+        raise ValueError(f"roll {roll}: marks: {e}") from None
+
+
+def print_result(row, out=None):
+    # text form of view_result for one fetch_result() row
+    print("Roll Number :", row[0], file=out)
+    print("Name        :", row[1], file=out)
+    print("Course      :", row[2], file=out)
+    total, percentage, grade, status = row[-4:]
+    if total is None:
+        print("Marks       : Not entered yet.\n", file=out)
+    else:
+        names = result_columns()[3:-4]
+        print("Marks       :", " | ".join(f"{n}: {'-' if m is None else m}" for n, m in zip(names, row[3:-4])),
+              file=out)
+        print("Total       :", total, file=out)
+        print("Percentage  :", round(percentage, 2), "%", file=out)
+        print("Grade       :", grade, file=out)
+        print("Status      :", status, "\n", file=out)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="app.py",
+        description="Student Result Manager. Run without arguments for the interactive menu.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def with_file(p):
+        p.add_argument("--file", "-f", metavar="CSV", help='read many records from a CSV file ("-" for stdin)')
+        return p
+
+    p = with_file(sub.add_parser("add-student", help="add students (one transaction)"))
+    p.add_argument("values", nargs="*", metavar="ROLL NAME COURSE")
+
+    p = with_file(sub.add_parser("set-marks", help="add or update marks (one transaction)"))
+    p.add_argument("values", nargs="*", metavar="ROLL MARKS",
+                   help="a roll followed by one mark per subject, in subject order")
+
+    p = with_file(sub.add_parser("view", help="show results for rolls"))
+    p.add_argument("values", nargs="*", metavar="ROLL")
+    p.add_argument("--format", choices=("text", "json", "csv"), default="text")
+
+    p = with_file(sub.add_parser("delete", help="delete students and their results (one transaction)"))
+    p.add_argument("values", nargs="*", metavar="ROLL")
+
+    for name in ("list-students", "list-results"):
+        p = sub.add_parser(name)
+        p.add_argument("--course")
+        p.add_argument("--limit", type=int)
+        p.add_argument("--offset", type=int, default=0)
+        p.add_argument("--format", choices=("text", "json", "csv"), default="text")
+        if name == "list-results":
+            p.add_argument("--grade")
+            p.add_argument("--status", choices=("PASS", "FAIL"), type=str.upper)
+            p.add_argument("--wide", action="store_true", help="include the marks of every subject")
+
+    p = with_file(sub.add_parser("rank", help="rank, dense rank and percentile rank of rolls"))
+    p.add_argument("values", nargs="*", metavar="ROLL")
+    p.add_argument("--course", help="rank within this course instead of the whole class")
+    p.add_argument("--format", choices=("text", "json"), default="text")
+
+    p = sub.add_parser("top", help="leaderboard: best results, optionally per course")
+    p.add_argument("-n", type=int, default=10)
+    p.add_argument("--course")
+    p.add_argument("--format", choices=("text", "json", "csv"), default="text")
+
+    p = sub.add_parser("changes", help="change log: who changed what and when, after sequence --since")
+    p.add_argument("--since", type=int, default=0, help="last sequence number already seen")
+    p.add_argument("--limit", type=int, default=1000)
+    p.add_argument("--roll", help="only changes to this roll")
+    p.add_argument("--format", choices=("text", "json"), default="text")
+
+    p = sub.add_parser("regrade", help="change the grading policy and re-grade every result (one transaction)")
+    p.add_argument("--boundaries", help='minimum percentage per grade, e.g. "75:A,60:B,50:C,35:D"')
+    p.add_argument("--pass-mark", help="minimum passing percentage")
+    p.add_argument("--show", action="store_true", help="print the current policy and change nothing")
+
+    p = sub.add_parser("stats", help="mean / median / percentiles / pass rate per course or subject")
+    p.add_argument("--by", choices=("course", "subject"), default="course")
+    p.add_argument("--format", choices=("text", "json"), default="text")
+    return parser
+
+
+def page_args(args):
+    # --limit / --offset of the list commands; no --limit means every row
+    limit = None if args.limit is None else parse_int(args.limit, min_value=1)
+    return limit, parse_int(args.offset, min_value=0)
+
+
+def run_command(args):
+    if args.command == "add-student":
+        records = [(parse_roll(r[0]), r[1], r[2]) for r in read_records(args.values, args.file, 3)]
+        print(f"Added {insert_students(records)} student(s).")
+    elif args.command == "set-marks":
+        width = 1 + len(repository.get_subjects(DB))
+        records = [parse_marks_record(r) for r in read_records(args.values, args.file, width)]
+        print(f"Saved marks for {save_marks(records)} student(s).")
+    elif args.command == "delete":
+        rolls = [parse_roll(r[0]) for r in read_records(args.values, args.file, 1)]
+        print(f"Deleted {delete_students(rolls)} student(s) and their results.")
+    elif args.command == "view":
+        rolls = [parse_roll(r[0]) for r in read_records(args.values, args.file, 1)]
+        rows = [fetch_result(roll) for roll in rolls]
+        missing = [roll for roll, row in zip(rolls, rows) if row is None]
+        rows = [row for row in rows if row is not None]
+        if args.format == "text":
+            for row in rows:
+                print_result(row)
+        else:
+            write_records(rows, result_columns(), args.format)
+        if missing:
+            raise ValueError("Record Not Found: " + ", ".join(map(str, missing)))
+    elif args.command == "rank":
+        rolls = [parse_roll(r[0]) for r in read_records(args.values, args.file, 1)]
+        ranks = [rank_of(roll, course=args.course, db=DB) for roll in rolls]
+        missing = [roll for roll, r in zip(rolls, ranks) if r is None]
+        ranks = [r for r in ranks if r is not None]
+        if args.format == "json":
+            json.dump(ranks, sys.stdout, indent=2)
+            print()
+        else:
+            for r in ranks:
+                print(f"Roll {r['roll']}: rank {r['rank']} of {r['out_of']} (dense {r['dense_rank']}), "
+                      f"{r['percentage']:.2f}%, {r['percent_rank'] * 100:.1f}% of the class ranked higher")
+        if missing:
+            raise ValueError("No result: " + ", ".join(map(str, missing)))
+    elif args.command == "top":
+        rows = top_n(parse_int(args.n, min_value=1), course=args.course, db=DB)
+        if args.format == "text":
+            for r in rows:
+                print(f"{r[0]:>4}. {r[2]:<6} {r[3]:<20} {r[4]:<10} {r[6]:>6.2f}%  {r[7]}")
+        else:
+            write_records(rows, LEADERBOARD_COLUMNS, args.format)
+    elif args.command == "changes":
+        changes = repository.changes_since(args.since, parse_int(args.limit, min_value=1), args.roll, DB)
+        if args.format == "json":
+            json.dump({"changes": changes, "last": changes[-1]["seq"] if changes else args.since},
+                      sys.stdout, indent=2)
+            print()
+        else:
+            for c in changes:
+                print(format_change(c))
+            if not changes:
+                print("No changes.")
+    elif args.command == "regrade":
+        if args.show:
+            print(format_policy(*repository.get_grading_policy(DB)))
+            return
+        boundaries = None if args.boundaries is None else parse_boundaries(args.boundaries)
+        pass_mark = None if args.pass_mark is None else parse_percentage(args.pass_mark)
+        boundaries, pass_mark, count = regrade_results(boundaries, pass_mark)
+        print(f"Re-graded {count} result(s): {format_policy(boundaries, pass_mark)}.")
+    elif args.command == "stats":
+        stats = group_stats(args.by, DB)
+        if args.format == "json":
+            json.dump(stats, sys.stdout, indent=2)
+            print()
+        elif stats:
+            print(format_stats(stats, args.by))
+        else:
+            print("No data.")
+    elif args.command == "list-students":
+        list_all_students(args.course, *page_args(args), output=args.format)
+    else:
+        list_results_summary(args.course, args.grade, args.status, *page_args(args),
+                             output=args.format, wide=args.wide)
+
+
+def main(argv=None):
+    # No arguments: interactive menu. Otherwise one subcommand per invocation, e.g.
+    #   python app.py add-student --file students.csv
+    #   python app.py set-marks 7 80 75 91
+    #   python app.py list-results --grade A --format json
+    #   python app.py list-results --wide --format csv > class.csv
+    #   python app.py top -n 10 --course CSE
+    #   python app.py stats --by subject
+    #   python app.py regrade --boundaries "80:A,65:B,50:C,40:D" --pass-mark 40
+    #   python app.py changes --since 120 --format json
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        menu()
+        return
+
+    args = build_parser().parse_args(argv)
+    setup_database(DB)
+    try:
+        run_command(args)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except BrokenPipeError:
+        # output piped into e.g. `head`, which stopped reading
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+
+
 if __name__ == "__main__":
-    menu()
+    main()
@@ -0,0 +1,241 @@
+"""
+Online backup, snapshots and restore of students.db.
+
+    python backup.py snapshot --db students.db --dir backups --keep 10
+    python backup.py list --dir backups
+    python backup.py restore backups/students-20260101-120000.db.gz --db students.db
+
+Copies are made with SQLite's backup API (sqlite3.Connection.backup), never
+by copying the file, so a snapshot is consistent even while the GUI, the
+admin dashboard or app.py are writing. The copy runs in steps of --pages
+pages inside one read transaction on the source: in WAL mode (the "shared"
+storage profile) a reader never blocks writers, and because the snapshot
+is pinned to that transaction, commits made during the copy neither tear
+it nor make the backup API start over.
+
+A snapshot is written to a temporary file, gzip-compressed (unless
+--no-compress) to <dir>/<name>-YYYYmmdd-HHMMSS.db.gz and only then
+renamed into place, so a half-written snapshot never looks complete.
+--keep removes the oldest snapshots of the same database beyond that many.
+
+restore checks the snapshot (PRAGMA integrity_check), snapshots the current
+database first, then copies the snapshot into the live file with the backup
+API and upgrades its schema (migrations.py). Other windows see the restored
+data on their next read (PRAGMA data_version).
+"""
+
+import argparse
+import glob
+import gzip
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import repository
+from database import DB_NAME, close_connections
+
+PAGES_PER_STEP = 4096          # pages copied per backup step (16 MB with 4 KiB pages)
+CHUNK = 1024 * 1024            # gzip read/write buffer
+STAMP = "%Y%m%d-%H%M%S"
+
+
+def _name(db):
+    return os.path.splitext(os.path.basename(db))[0]
+
+
+def _copy(src, dst, pages, progress):
+    # backup API in steps; progress(done_pages, total_pages) after each step
+    def step(status, remaining, total):
+        if progress:
+            progress(total - remaining, total)
+
+    # one read transaction for every step, so the copy is a single point in time
+    src.execute("BEGIN")
+    src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+    try:
+        src.backup(dst, pages=pages, progress=step)
+    finally:
+        src.rollback()
+
+
+def _rate(nbytes, seconds):
+    return nbytes / seconds / 1e6 if seconds else 0.0
+
+
+def snapshot(db=DB_NAME, out_dir="backups", keep=None, compress=True, pages=PAGES_PER_STEP, level=1,
+             progress=None):
+    """Back up `db` to a new timestamped file in `out_dir`. Returns a stats
+    dict: path, bytes (database size), stored (file size), seconds and MB/s
+    of the copy and compression steps."""
+    if not os.path.exists(db):
+        raise FileNotFoundError(f"no database at {db}")
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = time.strftime(STAMP)
+    path = os.path.join(out_dir, f"{_name(db)}-{stamp}.db" + (".gz" if compress else ""))
+    n = 1
+    while os.path.exists(path):   # two snapshots in the same second
+        n += 1
+        path = os.path.join(out_dir, f"{_name(db)}-{stamp}-{n}.db" + (".gz" if compress else ""))
+    stats = {"path": path}
+
+    fd, tmp = tempfile.mkstemp(suffix=".db", dir=out_dir)
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        # own connection: the pooled one may be inside the caller's transaction
+        src = sqlite3.connect(db, timeout=30)
+        dst = sqlite3.connect(tmp)
+        try:
+            _copy(src, dst, pages, progress)
+            # the copy inherits WAL from the header; a standalone file needs no -wal/-shm
+            dst.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            dst.close()
+            src.close()
+        stats["bytes"] = os.path.getsize(tmp)
+        stats["copy_seconds"] = time.perf_counter() - start
+        stats["copy_mb_s"] = _rate(stats["bytes"], stats["copy_seconds"])
+
+        start = time.perf_counter()
+        if compress:
+            packed = tmp + ".gz"
+            with open(tmp, "rb") as f, gzip.open(packed, "wb", compresslevel=level) as z:
+                shutil.copyfileobj(f, z, CHUNK)
+            os.remove(tmp)
+            tmp = packed
+        os.replace(tmp, path)
+        stats["stored"] = os.path.getsize(path)
+        stats["compress_seconds"] = time.perf_counter() - start
+        stats["compress_mb_s"] = _rate(stats["bytes"], stats["compress_seconds"]) if compress else 0.0
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    stats["seconds"] = stats["copy_seconds"] + stats["compress_seconds"]
+    if keep:
+        stats["removed"] = rotate(db, out_dir, keep)
+    return stats
+
+
+def list_snapshots(db=DB_NAME, out_dir="backups"):
+    # snapshots of `db`, oldest first (the timestamp in the name sorts)
+    paths = glob.glob(os.path.join(out_dir, f"{glob.escape(_name(db))}-*.db")) + \
+        glob.glob(os.path.join(out_dir, f"{glob.escape(_name(db))}-*.db.gz"))
+    return sorted(paths, key=lambda p: os.path.basename(p).rsplit(".db", 1)[0])
+
+
+def rotate(db=DB_NAME, out_dir="backups", keep=10):
+    """Delete all but the newest `keep` snapshots of `db`. Returns the removed paths."""
+    old = list_snapshots(db, out_dir)[:-keep] if keep > 0 else []
+    for path in old:
+        os.remove(path)
+    return old
+
+
+def _unpacked(path, tmp_dir):
+    # a plain .db snapshot is used as is; a .gz one is decompressed next to the target
+    if not path.endswith(".gz"):
+        return path, False
+    fd, tmp = tempfile.mkstemp(suffix=".db", dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as f, gzip.open(path, "rb") as z:
+            shutil.copyfileobj(z, f, CHUNK)
+    except (OSError, EOFError) as e:   # gzip.BadGzipFile is an OSError
+        os.remove(tmp)
+        raise ValueError(f"{path}: not a gzip snapshot ({e})") from None
+    return tmp, True
+
+
+def restore(path, db=DB_NAME, out_dir="backups", safety=True, pages=PAGES_PER_STEP, progress=None):
+    """Replace the contents of `db` with the snapshot at `path`.
+
+    With safety=True the current database is snapshotted to `out_dir`
+    first. Raises ValueError if the snapshot is not a valid database.
+    Returns a stats dict (bytes, seconds, MB/s, safety snapshot path).
+    """
+    source, temporary = _unpacked(path, os.path.dirname(os.path.abspath(db)))
+    try:
+        src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+        try:
+            try:
+                check = src.execute("PRAGMA integrity_check").fetchone()[0]
+            except sqlite3.DatabaseError as e:
+                raise ValueError(f"{path}: not a database ({e})") from None
+            if check != "ok":
+                raise ValueError(f"{path}: integrity check failed: {check}")
+            stats = {"safety": snapshot(db, out_dir)["path"] if safety and os.path.exists(db) else None,
+                     "bytes": os.path.getsize(source)}
+            start = time.perf_counter()
+            close_connections()   # this thread's pooled connection must not be mid-transaction
+            dst = sqlite3.connect(db, timeout=30)
+            try:
+                _copy(src, dst, pages, progress)
+            finally:
+                dst.close()
+            stats["seconds"] = time.perf_counter() - start
+            stats["mb_s"] = _rate(stats["bytes"], stats["seconds"])
+        finally:
+            src.close()
+    finally:
+        if temporary:
+            os.remove(source)
+    # an older snapshot may predate the current schema
+    repository.init(db)
+    repository.clear_caches()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Back up and restore students.db with the SQLite backup API.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def common(p):
+        p.add_argument("--db", default=DB_NAME)
+        p.add_argument("--dir", default="backups", help="snapshot directory")
+        return p
+
+    p = common(sub.add_parser("snapshot", help="write a timestamped snapshot"))
+    p.add_argument("--keep", type=int, help="keep only the newest N snapshots")
+    p.add_argument("--no-compress", action="store_true")
+    p.add_argument("--level", type=int, default=1, choices=range(1, 10), metavar="1-9", help="gzip level")
+    p.add_argument("--pages", type=int, default=PAGES_PER_STEP, help="pages per backup step")
+
+    common(sub.add_parser("list", help="list snapshots, oldest first"))
+
+    p = common(sub.add_parser("restore", help="replace the database with a snapshot"))
+    p.add_argument("snapshot")
+    p.add_argument("--no-safety", action="store_true", help="do not snapshot the current database first")
+    p.add_argument("--pages", type=int, default=PAGES_PER_STEP)
+    args = parser.parse_args(argv)
+
+    def show(done, total):
+        print(f"\r{done}/{total} pages", end="", file=sys.stderr)
+
+    try:
+        if args.command == "snapshot":
+            stats = snapshot(args.db, args.dir, args.keep, not args.no_compress, args.pages, args.level, show)
+            print(file=sys.stderr)
+            print(f"{stats['path']}: {stats['bytes'] / 1e6:.1f} MB -> {stats['stored'] / 1e6:.1f} MB, "
+                  f"copy {stats['copy_seconds']:.2f}s ({stats['copy_mb_s']:.0f} MB/s), "
+                  f"compress {stats['compress_seconds']:.2f}s ({stats['compress_mb_s']:.0f} MB/s)")
+            for path in stats.get("removed", ()):
+                print(f"removed {path}")
+        elif args.command == "list":
+            for path in list_snapshots(args.db, args.dir):
+                print(f"{path}  {os.path.getsize(path) / 1e6:.1f} MB")
+        else:
+            stats = restore(args.snapshot, args.db, args.dir, not args.no_safety, args.pages, show)
+            print(file=sys.stderr)
+            if stats["safety"]:
+                print(f"previous database saved to {stats['safety']}")
+            print(f"restored {args.snapshot} into {args.db}: {stats['bytes'] / 1e6:.1f} MB "
+                  f"in {stats['seconds']:.2f}s ({stats['mb_s']:.0f} MB/s)")
+    except (ValueError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
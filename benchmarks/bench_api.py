@@ -0,0 +1,117 @@
+"""
+Requests per second against server.py on localhost.
+
+Starts the API server in a child process on a generated database with
+N students, then keeps --connections keep-alive connections busy for
+--seconds, each requesting random /results/<roll> (and a /results page
+every --list-every requests). With --conditional, clients send back the
+ETag they got for a path, so unchanged results come back as 304.
+
+    python benchmarks/bench_api.py --students 20000 --connections 32 --workers 4 8
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_concurrency import make_db, percentile  # noqa: E402
+
+
+def run_server(port, workers):
+    # child process: serves $STUDENTS_DB (set by the parent before the spawn)
+    import server
+    asyncio.run(server.serve("127.0.0.1", port, workers))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def client(port, args, deadline, stats, seed):
+    rng = random.Random(seed)
+    etags = {}
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    count = 0
+    while time.perf_counter() < deadline:
+        count += 1
+        if args.list_every and count % args.list_every == 0:
+            path = f"/results?limit=50&offset={rng.randrange(0, args.students, 50)}"
+        else:
+            path = f"/results/{rng.randint(1, args.students)}"
+        request = f"GET {path} HTTP/1.1\r\nHost: localhost\r\n"
+        if args.conditional and path in etags:
+            request += f"If-None-Match: {etags[path]}\r\n"
+        start = time.perf_counter()
+        writer.write((request + "\r\n").encode())
+        head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        headers = dict(line.split(": ", 1) for line in head[1:] if ": " in line)
+        await reader.readexactly(int(headers.get("Content-Length", 0)))
+        stats["latencies"].append(time.perf_counter() - start)
+        status = head[0].split(" ")[1]
+        stats[status] = stats.get(status, 0) + 1
+        if "ETag" in headers:
+            etags[path] = headers["ETag"]
+    writer.close()
+
+
+async def load(port, args):
+    stats = {"latencies": []}
+    deadline = time.perf_counter() + args.seconds
+    await asyncio.gather(*(client(port, args, deadline, stats, i) for i in range(args.connections)))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--workers", type=int, nargs="+", default=[4])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--list-every", type=int, default=20, help="0: only single-result lookups")
+    parser.add_argument("--conditional", action="store_true", help="send If-None-Match")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "students.db")
+        make_db(db, args.students)
+        os.environ["STUDENTS_DB"] = db   # inherited by the spawned server, read as database.DB_NAME
+        print(f"{args.connections} connections, {args.students} students, {args.seconds:g}s per run")
+        for workers in args.workers:
+            port = free_port()
+            proc = multiprocessing.get_context("spawn").Process(target=run_server, args=(port, workers))
+            proc.start()
+            try:
+                wait_for(port)
+                stats = asyncio.run(load(port, args))
+            finally:
+                proc.terminate()
+                proc.join()
+            lat = stats.pop("latencies")
+            print(f"workers={workers}: {len(lat) / args.seconds:,.0f} req/s, "
+                  f"p50 {percentile(lat, 50) * 1000:.2f} ms, p99 {percentile(lat, 99) * 1000:.2f} ms, "
+                  f"status {dict(sorted(stats.items()))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Readers and writers on one students.db at the same time, per storage profile.
+
+Reader threads look up single results (like view_result) while writer
+threads re-save marks in transactions of --batch rows (like save_marks),
+each thread on its own connection. With the rollback journal ("legacy")
+a committing writer locks readers out; with WAL ("shared") they proceed
+in parallel, which shows in reads/s and in the read latency tail.
+
+    python benchmarks/bench_concurrency.py --readers 4 --writers 2 --seconds 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import dataset  # noqa: E402
+import repository  # noqa: E402
+
+LOOKUP_SQL = """
+    SELECT s.roll, s.name, s.course, r.total, r.percentage, r.grade, r.status
+    FROM students s LEFT JOIN mark_results r ON s.roll = r.roll
+    WHERE s.roll = ?
+"""
+
+
+def make_db(path, students, seed=1):
+    dataset.generate(path, students, seed=seed)
+
+
+def reader(path, students, stop, out, seed):
+    rng = random.Random(seed)
+    latencies, errors = [], 0
+    conn = database.get_connection(path)
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            conn.execute(LOOKUP_SQL, (str(rng.randint(1, students)),)).fetchone()
+        except database.sqlite3.OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    database.close_connections()
+    out.append(("read", latencies, errors))
+
+
+def writer(path, students, batch, stop, out, seed):
+    rng = random.Random(seed)
+    latencies, errors = [], 0
+
+    subject_ids = repository.subject_ids(3, path)
+    while not stop.is_set():
+        records = [(rng.randint(1, students), [(sid, rng.randint(0, 100)) for sid in subject_ids])
+                   for _ in range(batch)]
+        start = time.perf_counter()
+        try:
+            database.retry_on_busy(repository.save_marks, records, path)
+        except database.sqlite3.OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    database.close_connections()
+    out.append(("write", latencies, errors))
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else 0.0
+
+
+def run(profile, args, tmp):
+    database.set_storage_profile(profile)
+    path = os.path.join(tmp, f"{profile}.db")
+    make_db(path, args.students)
+    stop = threading.Event()
+    out = []
+    threads = [threading.Thread(target=reader, args=(path, args.students, stop, out, i))
+               for i in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(path, args.students, args.batch, stop, out, 100 + i))
+                for i in range(args.writers)]
+    retries = database.connection_stats()["retries"]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    result = {"profile": profile, "retries": database.connection_stats()["retries"] - retries}
+    for kind in ("read", "write"):
+        lat = [x for k, values, _ in out if k == kind for x in values]
+        result[kind] = {
+            "per_second": len(lat) / args.seconds,
+            "errors": sum(e for k, _, e in out if k == kind),
+            "p50_ms": percentile(lat, 50) * 1000,
+            "p99_ms": percentile(lat, 99) * 1000,
+            "max_ms": max(lat, default=0.0) * 1000,
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=1)
+    parser.add_argument("--batch", type=int, default=500, help="rows per write transaction")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--profiles", nargs="+", default=["legacy", "shared"],
+                        choices=sorted(database.STORAGE_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{args.readers} reader(s), {args.writers} writer(s), {args.students} students, "
+          f"{args.batch} rows per write, {args.seconds:g}s each")
+    print(f"{'profile':<8} {'kind':<6} {'ops/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in args.profiles:
+            result = run(profile, args, tmp)
+            for kind in ("read", "write"):
+                r = result[kind]
+                print(f"{profile:<8} {kind:<6} {r['per_second']:>9.0f} {r['p50_ms']:>8.2f} "
+                      f"{r['p99_ms']:>8.2f} {r['max_ms']:>8.2f} {r['errors']:>7}")
+            print(f"{profile:<8} retries after busy: {result['retries']}")
+
+
+if __name__ == "__main__":
+    main()
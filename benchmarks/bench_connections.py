@@ -0,0 +1,87 @@
+"""
+Connections opened per operation: per-call sqlite3.connect vs the pooled
+connection layer in database.py.
+
+Simulates entering marks for a whole class (one insert per cell).
+
+    python benchmarks/bench_connections.py --students 200 --subjects 5
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE students (roll TEXT PRIMARY KEY, name TEXT NOT NULL, course TEXT);
+CREATE TABLE marks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    roll TEXT NOT NULL,
+    subject_id INTEGER NOT NULL,
+    marks INTEGER NOT NULL
+);
+"""
+
+
+def make_db(path, students):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO students VALUES (?, ?, ?)",
+                     [(str(r), f"Student {r}", "CSE") for r in range(1, students + 1)])
+    conn.commit()
+    conn.close()
+
+
+def run_before(path, cells):
+    # Old pattern: connect, PRAGMA, one statement, commit, close
+    opened = 0
+    for roll, sid, m in cells:
+        conn = sqlite3.connect(path)
+        opened += 1
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.execute("INSERT INTO marks (roll, subject_id, marks) VALUES (?, ?, ?)", (roll, sid, m))
+        conn.commit()
+        conn.close()
+    return opened
+
+
+def run_after(path, cells):
+    before = database.connection_stats()["opened"]
+    for roll, sid, m in cells:
+        with database.transaction(path) as conn:
+            conn.execute("INSERT INTO marks (roll, subject_id, marks) VALUES (?, ?, ?)", (roll, sid, m))
+    opened = database.connection_stats()["opened"] - before
+    database.close_connections()
+    return opened
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--subjects", type=int, default=5)
+    args = parser.parse_args()
+
+    cells = [(str(r), s, (r * 7 + s) % 101)
+             for r in range(1, args.students + 1)
+             for s in range(1, args.subjects + 1)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, fn in (("before (connect per call)", run_before),
+                          ("after  (pooled)", run_after)):
+            path = os.path.join(tmp, f"{fn.__name__}.db")
+            make_db(path, args.students)
+            start = time.perf_counter()
+            opened = fn(path, cells)
+            elapsed = time.perf_counter() - start
+            print(f"{label}: {len(cells)} ops, {opened} connections opened "
+                  f"({opened / len(cells):.4f} per op), {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+PDF report cards per second with reports.export_report_cards.
+
+Builds a database with N students (benchmarks/dataset.py) in a temp directory and
+exports every report card, once per worker count.
+
+    python benchmarks/bench_report_cards.py --students 10000 --workers 1 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataset import generate  # noqa: E402
+from reports import export_report_cards, iter_cards  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bench.db")
+        generate(db, args.students)
+        for workers in args.workers:
+            out = os.path.join(tmp, f"out_{workers}")
+            stats = export_report_cards(iter_cards(db), out, workers, args.batch_size)
+            rate = stats["rendered"] / stats["seconds"]
+            print(f"workers={workers}: {stats['rendered']} PDFs in {stats['seconds']:.2f}s ({rate:.1f} PDFs/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+End-to-end timings of the hot paths at several class sizes, per front-end.
+
+    python benchmarks/bench_suite.py --sizes 1000 10000 --out baseline.json
+    python benchmarks/bench_suite.py --sizes 1000 10000 --compare baseline.json
+
+Databases come from benchmarks/dataset.py (seeded) and are kept in
+--data-dir, so the 100k / 1M files are generated once. Each operation runs
+--repeat times on random rolls; the JSON records median / min / max in ms
+per front-end, size and operation. --compare prints the ratio to a saved
+baseline and exits 1 if any median got slower than --threshold.
+
+Operations (the Tk handlers are measured through the functions they call):
+  app: save_marks, view_result, list_results_summary (first page, all rows
+       and all rows --wide), admin.load_data (one keyset page), export_pdf
+       (one report card)
+  gui: add_mark, save_marks, show_result, refresh_students_list (one
+       keyset page), export_pdf (one report card)
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import database  # noqa: E402
+import dataset  # noqa: E402
+import reports  # noqa: E402
+import repository  # noqa: E402
+
+HEAVY = {"list_results_summary_all", "list_results_wide_all"}   # full scans: fewer repeats
+
+
+def time_op(fn, repeat):
+    fn()   # warm-up (statement cache, page cache)
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(runs), "min_ms": min(runs), "max_ms": max(runs), "runs": repeat}
+
+
+def app_ops(db, size, rng):
+    # app.py functions all use app.DB
+    app.DB = db
+    roll = lambda: rng.randint(1, size)  # noqa: E731
+    names = app.result_columns()[3:-4]
+
+    def view_result():
+        repository.result_cache.clear()   # measure the lookup, not the cache
+        app.fetch_result(roll())
+
+    def export_pdf():
+        reports.render_report_card(reports.card_from_row(names, app.fetch_result(roll())), io.BytesIO())
+
+    return {
+        "save_marks": lambda: app.save_marks([(roll(), *(rng.randint(0, 100) for _ in names))]),
+        "view_result": view_result,
+        "list_results_summary_page": lambda: app.list_results_summary(limit=app.PAGE_SIZE, out=io.StringIO()),
+        "list_results_summary_all": lambda: app.list_results_summary(out=io.StringIO()),
+        "list_results_wide_all": lambda: app.list_results_summary(out=io.StringIO(), wide=True),
+        "admin_load_data_page": lambda: repository.result_page(after=str(roll()), limit=201, db=db),
+        "export_pdf": export_pdf,
+    }
+
+
+def gui_ops(db, size, rng):
+    import gui
+    gui.DB = db
+    subject_ids = [sid for sid, _ in gui.get_subjects()]
+    roll = lambda: str(rng.randint(1, size))  # noqa: E731
+
+    def show_result():
+        repository.clear_caches()
+        gui.load_result(roll())
+
+    def export_pdf():
+        student, marks, result = gui.load_result(roll())
+        card = {"roll": student[0], "name": student[1], "course": student[2] or "", "marks": list(marks),
+                "total": result[0], "percentage": result[1], "grade": result[2], "status": result[3]}
+        reports.render_report_card(card, io.BytesIO())
+
+    return {
+        "add_mark": lambda: gui.add_mark(roll(), rng.choice(subject_ids), rng.randint(0, 100)),
+        "save_marks": lambda: gui.save_marks_for_roll(roll(), [(sid, rng.randint(0, 100)) for sid in subject_ids]),
+        "show_result": show_result,
+        "refresh_students_list_page": lambda: gui.list_students_page(after=roll(), limit=201),
+        "export_pdf": export_pdf,
+    }
+
+
+OPS = {"app": app_ops, "gui": gui_ops}
+
+
+def dataset_path(data_dir, size, args):
+    # one directory per dataset
+    name = f"{size}_s{args.subjects}_c{args.courses}_seed{args.seed}"
+    return os.path.join(data_dir, name, "students.db")
+
+
+def prepare(path, size, args):
+    # generate once; reuse on later runs (the write benchmarks only touch a few rows)
+    if os.path.exists(path):
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    dataset.generate(path, size, args.subjects, args.courses, args.seed)
+    return True
+
+
+def compare(current, baseline, threshold):
+    slower = 0
+    print(f"\n{'frontend':<8} {'size':>8} {'operation':<28} {'baseline':>10} {'now':>10} {'ratio':>7}")
+    for frontend, sizes in current["results"].items():
+        for size, ops in sizes.items():
+            for op, now in ops.items():
+                old = baseline.get("results", {}).get(frontend, {}).get(size, {}).get(op)
+                if old is None:
+                    continue
+                ratio = now["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+                flag = "  SLOWER" if ratio > threshold else ""
+                slower += bool(flag)
+                print(f"{frontend:<8} {size:>8} {op:<28} {old['median_ms']:>10.3f} {now['median_ms']:>10.3f} "
+                      f"{ratio:>7.2f}{flag}")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000],
+                        help="students per database, e.g. 1000 10000 100000 1000000")
+    parser.add_argument("--frontends", nargs="+", choices=sorted(OPS), default=sorted(OPS))
+    parser.add_argument("--subjects", type=int, default=5)
+    parser.add_argument("--courses", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "srm_bench_data"))
+    parser.add_argument("--out", help="write the results as JSON (a baseline)")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="ratio counted as a regression")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+            "subjects": args.subjects,
+            "courses": args.courses,
+            "repeat": args.repeat,
+            "storage_profile": database.storage_profile(),
+        },
+        "results": {},
+    }
+    rng = random.Random(args.seed)
+    for frontend in args.frontends:
+        for size in args.sizes:
+            path = dataset_path(args.data_dir, size, args)
+            start = time.perf_counter()
+            if prepare(path, size, args):
+                print(f"generated {size} students in {time.perf_counter() - start:.1f}s")
+            timings = {}
+            for op, fn in OPS[frontend](path, size, rng).items():
+                repeat = max(3, args.repeat // 10) if op in HEAVY else args.repeat
+                timings[op] = time_op(fn, repeat)
+                print(f"{frontend:<8} {size:>8} {op:<28} {timings[op]['median_ms']:>10.3f} ms")
+            report["results"].setdefault(frontend, {})[str(size)] = timings
+            database.close_connections()
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nbaseline written to {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Seeded synthetic data for students.db.
+
+    python benchmarks/dataset.py --db students.db --students 100000
+    python benchmarks/dataset.py --db big.db --students 10000 --subjects 6 --courses 8
+
+Fills students, subjects, marks and mark_results (see repository.py).
+Use a new database file: rolls start at 1. The same --seed always gives
+the same data. Rows are written with executemany in chunks, one
+transaction per chunk. The change-log triggers (migrations.CHANGE_LOG)
+are off while generating, so the seeded rows are not logged and the
+benchmarks do not pay for a second row per write; they are restored at
+the end.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from grading import summary_rows  # noqa: E402
+from migrations import drop_change_triggers, ensure_change_log, first_subjects  # noqa: E402
+
+FIRST_NAMES = ("Aarav", "Priya", "Rahul", "Ananya", "Vikram", "Sneha", "Arjun", "Kavya", "Rohan", "Meera",
+               "Karthik", "Divya", "Aditya", "Pooja", "Siddharth", "Nisha", "Manoj", "Lakshmi", "Farhan", "Grace")
+LAST_NAMES = ("Sharma", "Patel", "Reddy", "Nair", "Iyer", "Gupta", "Khan", "Das", "Rao", "Menon",
+              "Joshi", "Singh", "Kumar", "Pillai", "Fernandes", "Bose", "Shetty", "Mehta", "Varma", "Hegde")
+COURSES = ("CSE", "ECE", "ME", "CE", "EEE", "IT", "BIO", "CHEM", "MATH", "PHY")
+
+
+def course_names(count):
+    return [COURSES[i] if i < len(COURSES) else f"C{i + 1}" for i in range(count)]
+
+
+def random_marks(rng, count):
+    # centred around 60 with a realistic spread and some failures
+    return [max(0, min(100, int(rng.gauss(60, 18)))) for _ in range(count)]
+
+
+def students(rng, count, courses):
+    for roll in range(1, count + 1):
+        yield (str(roll), f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", rng.choice(courses))
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate(db, count=1000, subjects=3, courses=4, seed=1, chunk_size=20000):
+    rng = random.Random(seed)
+    database.setup_database(db)
+    with database.transaction(db) as conn:
+        drop_change_triggers(conn)
+    try:
+        with database.transaction(db) as conn:
+            subject_ids = first_subjects(conn, subjects)
+        for chunk in _chunks(students(rng, count, course_names(courses)), chunk_size):
+            marks = [(s[0], random_marks(rng, len(subject_ids))) for s in chunk]
+            with database.transaction(db) as conn:
+                conn.executemany("INSERT INTO students (roll, name, course) VALUES (?, ?, ?)", chunk)
+                conn.executemany("INSERT INTO marks (roll, subject_id, marks) VALUES (?, ?, ?)",
+                                 [(roll, sid, m) for roll, ms in marks for sid, m in zip(subject_ids, ms)])
+                conn.executemany("INSERT INTO mark_results VALUES (?, ?, ?, ?, ?, ?)",
+                                 summary_rows((roll, len(ms), sum(ms)) for roll, ms in marks))
+    finally:
+        with database.transaction(db) as conn:
+            ensure_change_log(conn)
+    database.close_connections()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default=database.DB_NAME)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--subjects", type=int, default=3)
+    parser.add_argument("--courses", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    generate(args.db, args.students, args.subjects, args.courses, args.seed)
+    print(f"Wrote {args.students} students ({args.subjects} subjects) to {args.db} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,314 @@
+import functools
+import getpass
+import os
+import random
 import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
 
-DB_NAME = "students.db"
+from migrations import migrate
 
+# The one students.db every front-end opens: next to the code, not the working
+# directory, so app.py, gui.py, admin.py, the importer and the server run from
+# anywhere agree on it. STUDENTS_DB points all of them at another file.
+DB_NAME = os.environ.get("STUDENTS_DB") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "students.db")
 
-def get_connection():
-    # Always use this to get a connection
-    conn = sqlite3.connect(DB_NAME)
+# One connection per (thread, database file). sqlite3 connections must not be
+# shared between threads, so each thread gets its own pool.
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {"opened": 0, "checkouts": 0, "retries": 0}
+
+# Change-log seqs (migrations.CHANGE_LOG) committed by this process, per file,
+# so that external_writes() can tell our own threads' commits from other
+# processes'. Each range is (last seq before, last seq after) one transaction.
+_own_lock = threading.Lock()
+_own_writes = {}   # db key -> [(start, end), ...], oldest first
+MAX_OWN_RANGES = 1000
+
+# Storage profiles, applied to every new connection (see _open_connection).
+# "shared" lets several gui.py / admin.py windows use one students.db:
+# in WAL mode readers never wait for a writer (and a writer never waits for
+# readers), synchronous=NORMAL is crash-safe with WAL and saves an fsync per
+# commit, and busy_timeout makes a second writer wait instead of failing
+# with "database is locked". WAL needs all users on the same machine (no
+# network file systems). "legacy" is SQLite's own rollback-journal default.
+STORAGE_PROFILES = {
+    "shared": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,        # ms
+        "cache_size": -16000,        # negative = KiB, i.e. 16 MB page cache
+        "mmap_size": 64 * 1024 * 1024,
+    },
+    "legacy": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+        "cache_size": -2000,
+        "mmap_size": 0,
+    },
+}
+_profile = dict(STORAGE_PROFILES["shared"])
+
+
+def set_storage_profile(name="shared", **overrides):
+    """Choose the profile (plus per-PRAGMA overrides) for connections opened
+    from now on, e.g. set_storage_profile("shared", cache_size=-64000).
+    Call it at startup, before the first get_connection()."""
+    global _profile
+    if name not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown storage profile {name!r}; choose from {', '.join(STORAGE_PROFILES)}")
+    unknown = set(overrides) - set(STORAGE_PROFILES[name])
+    if unknown:
+        raise ValueError(f"Unknown storage setting(s): {', '.join(sorted(unknown))}")
+    _profile = {**STORAGE_PROFILES[name], **overrides}
+
+
+def storage_profile():
+    return dict(_profile)
+
+
+# Who is writing, as recorded in the change log (migrations.CHANGE_LOG) by
+# its triggers: the OS user and the program, unless set_actor() names someone.
+# transaction() puts it in the settings table for the triggers to read.
+def _default_actor():
+    try:
+        user = getpass.getuser()
+    except Exception:   # no user name in the environment
+        user = "unknown"
+    return f"{user}@{os.path.basename(sys.argv[0]) or 'python'}"
+
+
+_actor = _default_actor()
+
+
+def set_actor(name):
+    # e.g. the logged-in teacher; applies to every connection of this process
+    global _actor
+    _actor = name
+
+
+def _mark_actor(conn, actor):
+    # the 'actor' row lives only inside our own write transactions (None deletes it)
+    try:
+        if actor is None:
+            conn.execute("DELETE FROM settings WHERE key = 'actor'")
+        else:
+            conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('actor', ?)", (actor,))
+    except sqlite3.OperationalError as e:
+        if "no such table" not in str(e):   # a file not migrated yet has no settings
+            raise
+
+
+def _open_connection(db):
+    profile = _profile
+    conn = sqlite3.connect(db, timeout=profile["busy_timeout"] / 1000)
+    # PRAGMAs are applied once here, not on every checkout
     # Enable foreign keys for safety
     conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute(f"PRAGMA busy_timeout = {int(profile['busy_timeout'])}")
+    if db != ":memory:":
+        # journal_mode is stored in the file; the rest are per connection
+        conn.execute(f"PRAGMA journal_mode = {profile['journal_mode']}")
+    conn.execute(f"PRAGMA synchronous = {profile['synchronous']}")
+    conn.execute(f"PRAGMA cache_size = {int(profile['cache_size'])}")
+    conn.execute(f"PRAGMA mmap_size = {int(profile['mmap_size'])}")
+    with _stats_lock:
+        _stats["opened"] += 1
     return conn
 
 
-def setup_database():
-    with get_connection() as conn:
-        cursor = conn.cursor()
-
-        # Students table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS students (
-                roll INTEGER PRIMARY KEY,
-                name TEXT NOT NULL,
-                course TEXT NOT NULL
-            )
-        """)
-
-        # Marks + result table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS results (
-                roll INTEGER PRIMARY KEY,
-                subject1 INTEGER NOT NULL,
-                subject2 INTEGER NOT NULL,
-                subject3 INTEGER NOT NULL,
-                total INTEGER NOT NULL,
-                percentage REAL NOT NULL,
-                grade TEXT NOT NULL,
-                status TEXT NOT NULL,
-                FOREIGN KEY (roll) REFERENCES students(roll) ON DELETE CASCADE
-            )
-        """)
-
-        conn.commit()
+def _key(db):
+    return db if db == ":memory:" else os.path.abspath(db)
+
+
+def get_connection(db=DB_NAME):
+    # Always use this to get a connection.
+    # The connection is pooled for the calling thread: do not close it,
+    # use transaction() to group writes.
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = _local.pool = {}
+    key = _key(db)
+    conn = pool.get(key)
+    if conn is None:
+        conn = pool[key] = _open_connection(db)
+    with _stats_lock:
+        _stats["checkouts"] += 1
+    return conn
+
+
+def _pending(conn):
+    # after-commit callbacks of the calling thread, per pooled connection
+    pending = getattr(_local, "pending", None)
+    if pending is None:
+        pending = _local.pending = {}
+    return pending.setdefault(id(conn), [])
+
+
+def after_commit(db, fn):
+    """Call fn() once the open transaction on db commits (now if none is open).
+
+    For cache invalidation: a write that joins an outer transaction must
+    not drop cached values before that transaction's COMMIT, or another
+    thread could re-read and cache the old rows. Dropped on rollback.
+    """
+    conn = get_connection(db)
+    if conn.in_transaction:
+        _pending(conn).append(fn)
+    else:
+        fn()
+
+
+def _log_seq(conn):
+    # the change log's high-water mark (kept by AUTOINCREMENT); None without a change log
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'changes'").fetchone():
+        return None
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+    return row[0] if row else 0
+
+
+def _note_own_writes(db, start, end):
+    # caller holds _own_lock; consecutive ranges of our own merge into one
+    if start is None or end is None or end <= start:
+        return
+    ranges = _own_writes.setdefault(_key(db), [])
+    if ranges and ranges[-1][1] == start:
+        ranges[-1] = (ranges[-1][0], end)
+    else:
+        ranges.append((start, end))
+        del ranges[:-MAX_OWN_RANGES]   # a forgotten range only costs a needless cache clear
+
+
+def external_writes(db=DB_NAME, since=0):
+    """Return (seq, external): the change log's current seq and whether any
+    change after `since` was committed by another process. Commits from
+    this process's threads (transaction()) do not count. Without a change
+    log seq is None and every write counts as external."""
+    with _own_lock:   # a commit and the note of its seqs are one step (see transaction())
+        seq = _log_seq(get_connection(db))
+        ranges = list(_own_writes.get(_key(db), ()))
+    if seq is None or since is None or seq < since:   # no log, or the file was replaced
+        return seq, True
+    ours = sum(max(0, min(end, seq) - max(start, since)) for start, end in ranges)
+    return seq, ours < seq - since
+
+
+@contextmanager
+def transaction(db=DB_NAME):
+    """Run the block in a single transaction on the pooled connection.
+
+    Commits on success and rolls back on error. Nested scopes join the
+    outermost one, which is the only one that commits; callbacks queued
+    with after_commit() run after that commit.
+
+    Transactions are for writes, so they start with BEGIN IMMEDIATE: the
+    write lock is taken (waiting up to busy_timeout) before any statement
+    runs, instead of failing half-way when a read lock cannot be upgraded.
+    """
+    conn = get_connection(db)
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _mark_actor(conn, _actor)
+        start = _log_seq(conn)   # we hold the write lock: the seqs up to end are ours
+        yield conn
+        _mark_actor(conn, None)
+        end = _log_seq(conn)
+    except BaseException:
+        conn.rollback()
+        _pending(conn).clear()
+        raise
+    else:
+        with _own_lock:
+            conn.commit()
+            _note_own_writes(db, start, end)
+        callbacks = _pending(conn)
+        while callbacks:
+            callbacks.pop(0)()
+
+
+def is_busy_error(exc):
+    return isinstance(exc, sqlite3.OperationalError) and (
+        "locked" in str(exc) or "busy" in str(exc))
+
+
+def retry_on_busy(fn, *args, attempts=5, base_delay=0.05, **kwargs):
+    """Call fn(*args, **kwargs), retrying with exponential backoff (and
+    jitter) while it fails with "database is locked" / "busy".
+
+    busy_timeout already waits for the lock; this covers what is left, e.g.
+    a long writer in another process. fn should be one transaction, since
+    it is re-run from the start. Inside an open transaction there is no
+    retry: the caller's transaction has to be rolled back first.
+    """
+    for attempt in range(attempts):
+        try:
+            return fn(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            pool = getattr(_local, "pool", None) or {}
+            if (not is_busy_error(e) or attempt == attempts - 1
+                    or any(c.in_transaction for c in pool.values())):
+                raise
+            with _stats_lock:
+                _stats["retries"] += 1
+            time.sleep(base_delay * 2 ** attempt * (0.5 + random.random()))
+
+
+def retrying(fn):
+    # decorator form of retry_on_busy
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return retry_on_busy(fn, *args, **kwargs)
+    return wrapper
+
+
+def data_version(db=DB_NAME):
+    # Changes whenever another connection (thread or process) commits to db
+    return get_connection(db).execute("PRAGMA data_version").fetchone()[0]
+
+
+def close_connections():
+    # Close every pooled connection owned by the calling thread
+    pool = getattr(_local, "pool", None) or {}
+    for conn in pool.values():
+        conn.close()
+    pool.clear()
+    getattr(_local, "pending", {}).clear()
+
+
+def connection_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def keyset_page(db, sql, key, after=None, before=None, limit=100):
+    """Fetch one page of `sql` ordered by the unique column `key`.
+
+    Keyset pagination: pass the last key of the current page as `after` for
+    the next page, or the first key as `before` for the previous one, so
+    SQLite seeks on the index instead of skipping OFFSET rows. `sql` must be
+    a plain SELECT without WHERE/ORDER BY/LIMIT; rows come back in ascending
+    key order.
+    """
+    conn = get_connection(db)
+    if before is not None:
+        rows = conn.execute(f"{sql} WHERE {key} < ? ORDER BY {key} DESC LIMIT ?",
+                            (before, limit)).fetchall()
+        rows.reverse()
+        return rows
+    if after is not None:
+        return conn.execute(f"{sql} WHERE {key} > ? ORDER BY {key} LIMIT ?",
+                            (after, limit)).fetchall()
+    return conn.execute(f"{sql} ORDER BY {key} LIMIT ?", (limit,)).fetchall()
+
+
+def setup_database(db=DB_NAME):
+    # Create the schema (migrations.SCHEMA) in a new file, or upgrade an old one in place
+    with transaction(db) as conn:
+        migrate(conn)
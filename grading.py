@@ -0,0 +1,113 @@
+"""
+Grading engine shared by app.py, gui.py and admin.py.
+
+compute_results() grades many students at once from their totals and
+subject counts, as summed from the marks table (repository.py and
+migrations.py rebuild mark_results with it). It uses NumPy when installed
+and falls back to the standard library `array` module otherwise.
+
+Grade boundaries are configurable: pass `boundaries` as (min_percentage,
+grade) pairs, highest first, and `pass_mark` as the minimum passing
+percentage. Anything below the lowest boundary gets FAIL_GRADE. The policy
+in force is stored in the database (migrations.grading_policy) and changed
+with repository.regrade(), which re-grades every stored result.
+"""
+
+from array import array
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+DEFAULT_BOUNDARIES = ((75, "A"), (60, "B"), (50, "C"), (35, "D"))
+FAIL_GRADE = "F"
+PASS_MARK = 35
+
+
+def check_policy(boundaries, pass_mark):
+    """Validate a grading policy; returns it as (boundaries highest first, pass_mark).
+    Raises ValueError."""
+    boundaries = tuple(sorted(((t, str(g).strip()) for t, g in boundaries), reverse=True))
+    if not boundaries:
+        raise ValueError("At least one grade boundary is needed.")
+    for threshold, grade in boundaries:
+        if isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or not 0 <= threshold <= 100:
+            raise ValueError(f"Grade {grade}: boundary must be a percentage from 0 to 100, got {threshold!r}")
+        if not grade or grade == FAIL_GRADE:
+            raise ValueError(f"Boundary {threshold}: grade must be a name other than {FAIL_GRADE!r}")
+    if len({t for t, _ in boundaries}) < len(boundaries) or len({g for _, g in boundaries}) < len(boundaries):
+        raise ValueError("Each boundary and each grade may appear only once.")
+    if isinstance(pass_mark, bool) or not isinstance(pass_mark, (int, float)) or not 0 <= pass_mark <= 100:
+        raise ValueError(f"Pass mark must be a percentage from 0 to 100, got {pass_mark!r}")
+    return boundaries, pass_mark
+
+
+def format_policy(boundaries, pass_mark):
+    # e.g. "A >= 75, B >= 60, F below; pass mark 35"
+    return ", ".join(f"{g} >= {t}" for t, g in boundaries) + f", {FAIL_GRADE} below; pass mark {pass_mark}"
+
+
+def _thresholds(boundaries):
+    # ascending thresholds + matching labels, with FAIL_GRADE for "below all"
+    ordered = sorted(boundaries)
+    return [t for t, _ in ordered], [FAIL_GRADE] + [g for _, g in ordered]
+
+
+def grade_for(percentage, boundaries=DEFAULT_BOUNDARIES):
+    thresholds, labels = _thresholds(boundaries)
+    return labels[bisect_right(thresholds, percentage)]
+
+
+def status_for(percentage, pass_mark=PASS_MARK):
+    return "PASS" if percentage >= pass_mark else "FAIL"
+
+
+def calculate(marks, boundaries=DEFAULT_BOUNDARIES, pass_mark=PASS_MARK):
+    # One student: returns (total, percentage, grade, status)
+    total = sum(marks)
+    percentage = total / len(marks) if marks else 0
+    return total, percentage, grade_for(percentage, boundaries), status_for(percentage, pass_mark)
+
+
+def compute_results(totals, counts, boundaries=DEFAULT_BOUNDARIES, pass_mark=PASS_MARK):
+    """Grade every student at once.
+
+    `totals` and `counts` hold each student's sum of marks and number of
+    subjects (counts > 0). Returns a dict of "total", "percentage",
+    "grade" and "status", each with one entry per student.
+    """
+    thresholds, labels = _thresholds(boundaries)
+    if not len(totals):
+        return {"total": [], "percentage": [], "grade": [], "status": []}
+
+    if np is not None:
+        total = np.asarray(totals, dtype=np.int64)
+        percentage = total / np.asarray(counts, dtype=np.int64)
+        grade = np.asarray(labels)[np.searchsorted(thresholds, percentage, side="right")]
+        status = np.where(percentage >= pass_mark, "PASS", "FAIL")
+        return {"total": total.tolist(), "percentage": percentage.tolist(),
+                "grade": grade.tolist(), "status": status.tolist()}
+
+    total = array("q", totals)
+    percentage = array("d", (t / n for t, n in zip(total, counts)))
+    return {
+        "total": total.tolist(),
+        "percentage": percentage.tolist(),
+        "grade": [labels[bisect_right(thresholds, p)] for p in percentage],
+        "status": ["PASS" if p >= pass_mark else "FAIL" for p in percentage],
+    }
+
+
+def result_rows(totals, counts, boundaries=DEFAULT_BOUNDARIES, pass_mark=PASS_MARK):
+    # compute_results() transposed into (total, percentage, grade, status) tuples
+    r = compute_results(totals, counts, boundaries, pass_mark)
+    return list(zip(r["total"], r["percentage"], r["grade"], r["status"]))
+
+
+def summary_rows(rows, boundaries=DEFAULT_BOUNDARIES, pass_mark=PASS_MARK):
+    # [(roll, subjects, total), ...] -> mark_results rows (roll, subjects, total, percentage, grade, status)
+    rows = list(rows)
+    graded = result_rows([t for _, _, t in rows], [n for _, n, _ in rows], boundaries, pass_mark)
+    return [(roll, n, *result) for (roll, n, _), result in zip(rows, graded)]
@@ -10,121 +10,107 @@ Features:
 - Uses SQLite DB: students.db
 """
 
-import sqlite3
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox
 import os
-from tkinter import simpledialog, messagebox
-DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "students.db")
+from tkinter import filedialog
+import repository
+from database import DB_NAME
+from widgets import PagedTreeview, SearchBox
+from search import search_students
+from tasks import TaskRunner
+from ranking import rank_of
+from analytics import BINS, group_stats, histogram_labels
+from reports import count_cards, export_class_pdf, export_report_cards, export_zip, iter_cards
+from backup import snapshot
+DB = DB_NAME
+BACKUP_DIR = os.path.join(os.path.dirname(DB), "backups")
+BACKUP_KEEP = 10
 
 print("DB FILE PATH:", os.path.abspath(DB))   # ← Helps you see where DB is saved
 
 # ---------- Database helpers ----------
-def get_conn():
-    conn = sqlite3.connect(DB)
-    return conn
+# Thin wrappers over repository.py (queries, caches) for this window's DB.
+def cache_stats():
+    return repository.cache_stats()
 
 def init_db():
-    conn = get_conn()
-    cur = conn.cursor()
-    # students table
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS students (
-        roll TEXT PRIMARY KEY,
-        name TEXT NOT NULL,
-        course TEXT
-    )
-    """)
-    # subjects table (supports dynamic subjects later)
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS subjects (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT UNIQUE NOT NULL
-    )
-    """)
-    # marks table
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS marks (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        roll TEXT NOT NULL,
-        subject_id INTEGER NOT NULL,
-        marks INTEGER NOT NULL,
-        FOREIGN KEY (roll) REFERENCES students(roll),
-        FOREIGN KEY (subject_id) REFERENCES subjects(id)
-    )
-    """)
-    conn.commit()
-
-    # if no subjects exist, insert default three subjects
-    cur.execute("SELECT COUNT(*) FROM subjects")
-    count = cur.fetchone()[0]
-    if count == 0:
-        cur.executemany("INSERT INTO subjects (name) VALUES (?)", [("Subject1",), ("Subject2",), ("Subject3",)])
-        conn.commit()
-    conn.close()
+    repository.init(DB)
 
 def add_student_to_db(roll, name, course):
-    conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute("INSERT INTO students (roll, name, course) VALUES (?, ?, ?)", (roll, name, course))
-        conn.commit()
+        repository.add_students([(roll, name, course)], DB)
         return True, "Student added."
-    except sqlite3.IntegrityError:
+    except ValueError:
         return False, "A student with that roll number already exists."
-    finally:
-        conn.close()
 
 def delete_student_from_db(roll):
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("DELETE FROM marks WHERE roll=?", (roll,))
-    cur.execute("DELETE FROM students WHERE roll=?", (roll,))
-    conn.commit()
-    conn.close()
-
-def list_students_db():
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("SELECT roll, name, course FROM students ORDER BY roll")
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    repository.delete_students([roll], DB, missing_ok=True)
+
+def list_students_page(after=None, before=None, limit=200):
+    return repository.list_students_page(after, before, limit, DB)
+
+def get_student(roll):
+    return repository.get_student(roll, DB)
+
+def student_exists(roll):
+    return repository.student_exists(roll, DB)
 
 def get_subjects():
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("SELECT id, name FROM subjects ORDER BY id")
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    return repository.get_subjects(DB)
 
 def add_mark(roll, subject_id, marks):
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("INSERT INTO marks (roll, subject_id, marks) VALUES (?, ?, ?)", (roll, subject_id, marks))
-    conn.commit()
-    conn.close()
+    repository.add_mark(roll, subject_id, marks, DB)
+
+def save_marks_for_roll(roll, marks):
+    # replace all marks for a roll in one transaction; marks is [(subject_id, marks), ...]
+    repository.save_marks([(roll, marks)], DB, replace=True)
 
 def get_marks_for_roll(roll):
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("""
-        SELECT s.name, m.marks FROM marks m
-        JOIN subjects s ON m.subject_id = s.id
-        WHERE m.roll = ?
-        ORDER BY s.id
-    """, (roll,))
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    return repository.get_marks(roll, DB)
+
+def add_subject_to_db(name):
+    try:
+        repository.add_subject(name, DB)
+        return True, f"Subject '{name}' added."
+    except ValueError as e:
+        return False, str(e)
+
+def remove_subject_from_db(sid):
+    repository.remove_subject(sid, DB)
+
+def load_result(roll):
+    # everything show_result needs, from one wide row (repository.result_row): (student, marks, result) or None
+    row = repository.result_row(roll, db=DB)
+    if row is None:
+        return None
+    names = repository.result_columns(db=DB)[3:-4]
+    marks = [(n, m) for n, m in zip(names, row[3:-4]) if m is not None]
+    result = None
+    if marks:
+        ranked = rank_of(roll, db=DB)
+        if ranked is None:   # deleted by another window since the row was read
+            return None
+        result = (*row[-4:], ranked["rank"], ranked["out_of"])
+    return row[:3], marks, result
+
+def export_all_report_cards(out_dir, progress=None):
+    # one PDF per student with marks, rendered on a process pool (see reports.py)
+    return export_report_cards(iter_cards(DB), out_dir, progress=progress, total=count_cards(DB))
+
+def backup_db(progress=None):
+    # online snapshot while the app keeps running; restore with `python backup.py restore`
+    return snapshot(DB, BACKUP_DIR, keep=BACKUP_KEEP, progress=progress)
+
+def export_class_file(fmt, path, progress=None):
+    # whole class as one PDF ("pdf") or a ZIP of per-student PDFs ("zip"), streamed from the cursor
+    export = export_class_pdf if fmt == "pdf" else export_zip
+    return export(iter_cards(DB), path, progress=progress, total=count_cards(DB))
 
 # ---------- Business logic ----------
-def calculate_grade(percentage):
-    if percentage >= 75:
-        return "A"
-    elif percentage >= 60:
-        return "B"
-    elif percentage >= 50:
-        return "C"
-    elif percentage >= 35:
-        return "D"
-    else:
-        return "F"
+def load_statistics(by):
+    # per-course / per-subject stats (see analytics.py)
+    return group_stats(by, DB)
 
 # ---------- GUI ----------
 class App:
@@ -133,6 +119,18 @@ class App:
         master.title("Student Result Manager")
         master.geometry("800x500")
 
+        # DB work runs on worker threads; results come back via after() polling
+        self.tasks = TaskRunner(master, on_busy=self.show_busy)
+        master.bind("<Destroy>", lambda e: self.tasks.shutdown() if e.widget is master else None)
+
+        # Status bar: message + progress for long operations
+        bar = ttk.Frame(master)
+        bar.pack(side="bottom", fill="x", padx=10)
+        self.lbl_status = ttk.Label(bar, anchor="w", text="Ready")
+        self.lbl_status.pack(side="left", fill="x", expand=True)
+        self.progress = ttk.Progressbar(bar, length=200, mode="determinate")
+        self.progress.pack(side="right")
+
         # Notebook (tabs)
         self.nb = ttk.Notebook(master)
         self.nb.pack(fill="both", expand=True, padx=10, pady=10)
@@ -140,19 +138,39 @@ class App:
         self.tab_students = ttk.Frame(self.nb)
         self.tab_marks = ttk.Frame(self.nb)
         self.tab_results = ttk.Frame(self.nb)
+        self.tab_stats = ttk.Frame(self.nb)
         self.tab_admin = ttk.Frame(self.nb)
 
         self.nb.add(self.tab_students, text="Students")
         self.nb.add(self.tab_marks, text="Marks")
         self.nb.add(self.tab_results, text="Results")
+        self.nb.add(self.tab_stats, text="Statistics")
         self.nb.add(self.tab_admin, text="Admin")
 
         self.build_students_tab()
         self.build_marks_tab()
         self.build_results_tab()
+        self.build_stats_tab()
         self.build_admin_tab()
 
         self.refresh_students_list()
+        # pick up writes from other windows/processes (PRAGMA data_version);
+        # the caches are cleared before the page is re-read
+        self.students_view.watch(lambda: repository.sync_caches(DB))
+
+    # ---- Status bar ----
+    def show_busy(self, pending):
+        if pending:
+            self.lbl_status.config(text=f"Working... ({pending} pending)")
+        else:
+            self.lbl_status.config(text="Ready")
+            self.progress["value"] = 0
+
+    def show_progress(self, done, total):
+        # on_progress callback for long tasks (runs on the UI thread)
+        self.progress["maximum"] = max(total, 1)
+        self.progress["value"] = done
+        self.lbl_status.config(text=f"Working... {done} / {total}")
 
     # ---- Students tab ----
     def build_students_tab(self):
@@ -179,12 +197,16 @@ class App:
         frm_right = ttk.Frame(self.tab_students, padding=10)
         frm_right.pack(side="left", fill="both", expand=True)
 
+        # search as you type (name / course prefixes); empty box shows all students again
+        SearchBox(frm_right, self.search_students).pack(fill="x", pady=(0, 6))
+
         columns = ("roll", "name", "course")
-        self.tree_students = ttk.Treeview(frm_right, columns=columns, show="headings")
+        self.students_view = PagedTreeview(frm_right, columns, list_students_page, runner=self.tasks)
+        self.students_view.pack(fill="both", expand=True)
+        self.tree_students = self.students_view.tree
         for col in columns:
             self.tree_students.heading(col, text=col.capitalize())
             self.tree_students.column(col, width=150)
-        self.tree_students.pack(fill="both", expand=True)
 
     def add_student(self):
         roll = self.ent_roll.get().strip()
@@ -193,13 +215,18 @@ class App:
         if not roll or not name:
             messagebox.showwarning("Missing data", "Please enter both roll and name.")
             return
-        ok, msg = add_student_to_db(roll, name, course)
+        self.tasks.submit(add_student_to_db, roll, name, course,
+                          on_done=lambda outcome: self._student_added((roll, name, course), outcome))
+
+    def _student_added(self, row, outcome):
+        ok, msg = outcome
         if ok:
             messagebox.showinfo("Success", msg)
             self.ent_roll.delete(0, tk.END)
             self.ent_name.delete(0, tk.END)
             self.ent_course.delete(0, tk.END)
-            self.refresh_students_list()
+            # show just the new row instead of reloading the list
+            self.students_view.upsert_row(row)
         else:
             messagebox.showerror("Error", msg)
 
@@ -208,17 +235,23 @@ class App:
         if not selected:
             messagebox.showwarning("Select", "Please select a student in the list to delete.")
             return
-        roll = self.tree_students.item(selected[0])['values'][0]
+        # the item iid is the roll exactly as stored (Tk may turn "007" into 7 in 'values')
+        roll = selected[0]
         if messagebox.askyesno("Confirm", f"Delete student {roll}?"):
-            delete_student_from_db(roll)
-            self.refresh_students_list()
-            messagebox.showinfo("Deleted", f"Student {roll} deleted.")
+            def done(_):
+                self.students_view.remove_row(roll)
+                messagebox.showinfo("Deleted", f"Student {roll} deleted.")
+            self.tasks.submit(delete_student_from_db, roll, on_done=done)
+
+    def search_students(self, text):
+        if text:
+            self.students_view.set_filter(lambda limit: search_students(text, limit=limit, db=DB))
+        else:
+            self.students_view.set_filter(None)
 
     def refresh_students_list(self):
-        for i in self.tree_students.get_children():
-            self.tree_students.delete(i)
-        for r, n, c in list_students_db():
-            self.tree_students.insert("", tk.END, values=(r, n, c))
+        # only the current page is re-fetched, and applied as a diff
+        self.students_view.refresh()
 
     # ---- Marks tab ----
     def build_marks_tab(self):
@@ -250,11 +283,14 @@ class App:
         if not roll:
             messagebox.showwarning("Missing", "Enter roll first.")
             return
+        self.tasks.submit(get_subjects, key="subjects-for-marks",
+                          on_done=lambda subjects: self._show_subject_entries(roll, subjects))
+
+    def _show_subject_entries(self, roll, subjects):
         # clear previous entries
         for child in self.subjects_frame.winfo_children():
             child.destroy()
         self.subject_entries.clear()
-        subjects = get_subjects()
         for sid, sname in subjects:
             lbl = ttk.Label(self.subjects_frame, text=sname)
             ent = ttk.Entry(self.subjects_frame)
@@ -269,17 +305,8 @@ class App:
         if not roll:
             messagebox.showwarning("Missing", "Enter roll first.")
             return
-        # ensure student exists
-        students = {r for r,_,_ in list_students_db()}
-        if roll not in students:
-            messagebox.showerror("No such student", "Roll not found in students. Add student first.")
-            return
-        # save marks (delete existing marks for that roll first)
-        conn = get_conn(); cur = conn.cursor()
-        cur.execute("DELETE FROM marks WHERE roll=?", (roll,))
-        conn.commit()
-        conn.close()
-        any_saved = False
+        # validate every entry before touching the existing marks
+        marks = []
         for sid, sname, ent in self.subject_entries:
             val = ent.get().strip()
             if val == "":
@@ -291,17 +318,33 @@ class App:
             except ValueError:
                 messagebox.showerror("Invalid", f"Marks for {sname} must be integer 0-100.")
                 return
-            add_mark(roll, sid, m)
-            any_saved = True
-        if any_saved:
+            marks.append((sid, m))
+        if not marks:
+            messagebox.showinfo("No data", "No marks entered.")
+            return
+
+        def work():
+            # ensure student exists
+            if not student_exists(roll):
+                return False
+            # replaces the old marks atomically (one commit)
+            save_marks_for_roll(roll, marks)
+            return True
+
+        def done(saved):
+            if not saved:
+                messagebox.showerror("No such student", "Roll not found in students. Add student first.")
+                return
             messagebox.showinfo("Saved", "Marks saved.")
             self.refresh_marks_list(roll)
-        else:
-            messagebox.showinfo("No data", "No marks entered.")
+
+        self.tasks.submit(work, on_done=done)
 
     def refresh_marks_list(self, roll):
+        self.tasks.submit(get_marks_for_roll, roll, key="marks-list", on_done=self._show_marks_list)
+
+    def _show_marks_list(self, rows):
         self.list_marks.delete(0, tk.END)
-        rows = get_marks_for_roll(roll)
         if not rows:
             self.list_marks.insert(tk.END, "No marks found.")
             return
@@ -322,38 +365,123 @@ class App:
         self.txt_result = tk.Text(frm, height=15)
         self.txt_result.pack(fill="both", expand=True, pady=10)
 
-        ttk.Button(frm, text="Export to PDF (placeholder)", command=self.export_pdf_placeholder).pack()
+        exports = ttk.Frame(frm)
+        exports.pack()
+        ttk.Button(exports, text="Export All Report Cards (PDF)", command=self.export_report_cards).pack(side="left", padx=4)
+        ttk.Button(exports, text="Export Class PDF", command=self.export_class_pdf).pack(side="left", padx=4)
+        ttk.Button(exports, text="Export ZIP", command=self.export_zip).pack(side="left", padx=4)
 
     def show_result(self):
         roll = self.ent_res_roll.get().strip()
         if not roll:
             messagebox.showwarning("Enter", "Enter roll.")
             return
-        # get student
-        students = {r:(n,c) for r,n,c in list_students_db()}
-        if roll not in students:
+        self.tasks.submit(load_result, roll, key="result", on_done=self._show_result)
+
+    def _show_result(self, loaded):
+        if loaded is None:
             messagebox.showerror("Not found", "Roll not found.")
             return
-        name, course = students[roll]
-        marks = get_marks_for_roll(roll)
+        (roll, name, course), marks, result = loaded
         self.txt_result.delete("1.0", tk.END)
         self.txt_result.insert(tk.END, f"Roll: {roll}\nName: {name}\nCourse: {course}\n\n")
         if not marks:
             self.txt_result.insert(tk.END, "No marks found.\n")
             return
-        total = 0
-        count = 0
         for subj, m in marks:
             self.txt_result.insert(tk.END, f"{subj}: {m}\n")
-            total += m
-            count += 1
-        percentage = total / count if count else 0
-        grade = calculate_grade(percentage)
-        status = "Pass" if percentage >= 35 else "Fail"
+        total, percentage, grade, status, rank, out_of = result
+        status = status.capitalize()
         self.txt_result.insert(tk.END, f"\nTotal: {total}\nPercentage: {percentage:.2f}%\nGrade: {grade}\nStatus: {status}\n")
+        if rank is not None:
+            self.txt_result.insert(tk.END, f"Rank: {rank} of {out_of}\n")
 
-    def export_pdf_placeholder(self):
-        messagebox.showinfo("Export", "PDF export will be implemented in the next step (ReportLab).")
+    def export_report_cards(self):
+        out_dir = filedialog.askdirectory(title="Folder for report cards")
+        if not out_dir:
+            return
+
+        def done(stats):
+            messagebox.showinfo("Export", f"{stats['rendered']} report cards written to {out_dir} "
+                                          f"({stats['skipped']} already there).")
+
+        self.tasks.submit(export_all_report_cards, out_dir, key="export",
+                          on_done=done, on_progress=self.show_progress)
+
+    def export_class_pdf(self):
+        path = filedialog.asksaveasfilename(title="Class PDF", defaultextension=".pdf",
+                                            filetypes=[("PDF", "*.pdf")])
+        if path:
+            self.tasks.submit(export_class_file, "pdf", path, key="export", on_progress=self.show_progress,
+                              on_done=lambda stats: messagebox.showinfo("Export", f"{stats['rendered']} pages written to {path}"))
+
+    def export_zip(self):
+        path = filedialog.asksaveasfilename(title="Report cards ZIP", defaultextension=".zip",
+                                            filetypes=[("ZIP", "*.zip")])
+        if path:
+            self.tasks.submit(export_class_file, "zip", path, key="export", on_progress=self.show_progress,
+                              on_done=lambda stats: messagebox.showinfo("Export", f"{stats['rendered']} report cards written to {path}"))
+
+    # ---- Statistics tab ----
+    def build_stats_tab(self):
+        frm = ttk.Frame(self.tab_stats, padding=10)
+        frm.pack(fill="both", expand=True)
+
+        top = ttk.Frame(frm)
+        top.pack(anchor="w")
+        ttk.Label(top, text="Group by:").pack(side="left")
+        self.cmb_stats_by = ttk.Combobox(top, values=("course", "subject"), state="readonly", width=10)
+        self.cmb_stats_by.set("course")
+        self.cmb_stats_by.pack(side="left", padx=6)
+        self.cmb_stats_by.bind("<<ComboboxSelected>>", lambda e: self.refresh_stats())
+        ttk.Button(top, text="Refresh", command=self.refresh_stats).pack(side="left")
+
+        cols = ("group", "count", "mean", "median", "stddev", "p25", "p75", "p90", "pass")
+        heads = ("Group", "N", "Mean", "Median", "Std Dev", "P25", "P75", "P90", "Pass %")
+        self.tree_stats = ttk.Treeview(frm, columns=cols, show="headings", height=8)
+        for c, h in zip(cols, heads):
+            self.tree_stats.heading(c, text=h)
+            self.tree_stats.column(c, width=140 if c == "group" else 70, anchor="w" if c == "group" else "e")
+        self.tree_stats.pack(fill="x", pady=8)
+        self.tree_stats.bind("<<TreeviewSelect>>", lambda e: self.draw_histogram())
+
+        # histogram of the selected group
+        self.cnv_hist = tk.Canvas(frm, height=180, background="white")
+        self.cnv_hist.pack(fill="both", expand=True)
+        self.stats = []   # [(group, stats)], row i has iid str(i)
+        self.refresh_stats()
+
+    def refresh_stats(self):
+        self.tasks.submit(load_statistics, self.cmb_stats_by.get(), key="stats", on_done=self._show_stats)
+
+    def _show_stats(self, stats):
+        self.stats = list(stats.items())
+        self.tree_stats.delete(*self.tree_stats.get_children())
+        for i, (group, s) in enumerate(self.stats):
+            p = s["percentiles"]
+            self.tree_stats.insert("", tk.END, iid=str(i), values=(
+                group, s["count"], f"{s['mean']:.2f}", f"{s['median']:.2f}", f"{s['stddev']:.2f}",
+                f"{p[25]:.1f}", f"{p[75]:.1f}", f"{p[90]:.1f}", f"{s['pass_rate'] * 100:.1f}"))
+        if self.stats:
+            self.tree_stats.selection_set("0")
+        self.draw_histogram()
+
+    def draw_histogram(self):
+        self.cnv_hist.delete("all")
+        sel = self.tree_stats.selection()
+        if not sel:
+            return
+        hist = self.stats[int(sel[0])][1]["histogram"]
+        w = max(self.cnv_hist.winfo_width(), 400)
+        h = max(self.cnv_hist.winfo_height(), 180)
+        bar_w = (w - 20) / BINS
+        top = max(hist) or 1
+        for i, (count, label) in enumerate(zip(hist, histogram_labels())):
+            x0 = 10 + i * bar_w
+            y0 = h - 20 - (h - 45) * count / top
+            self.cnv_hist.create_rectangle(x0 + 2, y0, x0 + bar_w - 2, h - 20, fill="steelblue")
+            self.cnv_hist.create_text(x0 + bar_w / 2, h - 10, text=label, font=("TkDefaultFont", 8))
+            self.cnv_hist.create_text(x0 + bar_w / 2, y0 - 8, text=str(count), font=("TkDefaultFont", 8))
 
     # ---- Admin tab: subject management (simple) ----
     def build_admin_tab(self):
@@ -369,6 +497,8 @@ class App:
 
         ttk.Label(left, text="Remove Subject (select from list):").pack(anchor="w", pady=(10,0))
         ttk.Button(left, text="Remove Selected", command=self.remove_selected_subject).pack(pady=6)
+        ttk.Button(left, text="Cache Stats", command=self.show_cache_stats).pack(pady=(20, 6))
+        ttk.Button(left, text="Backup Now", command=self.backup_now).pack(pady=6)
 
         right = ttk.Frame(frm)
         right.pack(side="left", fill="both", expand=True)
@@ -383,17 +513,15 @@ class App:
         if not name:
             messagebox.showwarning("Missing", "Enter subject name.")
             return
-        conn = get_conn(); cur = conn.cursor()
-        try:
-            cur.execute("INSERT INTO subjects (name) VALUES (?)", (name,))
-            conn.commit()
-            messagebox.showinfo("Added", f"Subject '{name}' added.")
-            self.ent_new_subject.delete(0, tk.END)
-            self.refresh_subjects()
-        except sqlite3.IntegrityError:
-            messagebox.showerror("Exists", "Subject already exists.")
-        finally:
-            conn.close()
+        def done(outcome):
+            ok, msg = outcome
+            if ok:
+                messagebox.showinfo("Added", msg)
+                self.ent_new_subject.delete(0, tk.END)
+                self.refresh_subjects()
+            else:
+                messagebox.showerror("Exists", msg)
+        self.tasks.submit(add_subject_to_db, name, on_done=done)
 
     def remove_selected_subject(self):
         sel = self.tree_subjects.selection()
@@ -402,17 +530,28 @@ class App:
             return
         sid = self.tree_subjects.item(sel[0])['values'][0]
         if messagebox.askyesno("Confirm", "Removing a subject will delete related marks. Continue?"):
-            conn = get_conn(); cur = conn.cursor()
-            cur.execute("DELETE FROM marks WHERE subject_id=?", (sid,))
-            cur.execute("DELETE FROM subjects WHERE id=?", (sid,))
-            conn.commit(); conn.close()
-            messagebox.showinfo("Removed", "Subject removed.")
-            self.refresh_subjects()
+            def done(_):
+                messagebox.showinfo("Removed", "Subject removed.")
+                self.refresh_subjects()
+            self.tasks.submit(remove_subject_from_db, sid, on_done=done)
+
+    def show_cache_stats(self):
+        lines = [f"{name}: {s['hits']} hits, {s['misses']} misses ({s['hit_rate']:.0%}), {s['size']}/{s['maxsize']} entries"
+                 for name, s in cache_stats().items()]
+        messagebox.showinfo("Cache", "\n".join(lines))
+
+    def backup_now(self):
+        def done(stats):
+            messagebox.showinfo("Backup", f"Saved {stats['path']} ({stats['bytes'] / 1e6:.1f} MB "
+                                          f"in {stats['seconds']:.1f}s).")
+        self.tasks.submit(backup_db, key="backup", on_done=done, on_progress=self.show_progress)
 
     def refresh_subjects(self):
-        for i in self.tree_subjects.get_children():
-            self.tree_subjects.delete(i)
-        for sid, name in get_subjects():
+        self.tasks.submit(get_subjects, key="subjects", on_done=self._show_subjects)
+
+    def _show_subjects(self, subjects):
+        self.tree_subjects.delete(*self.tree_subjects.get_children())
+        for sid, name in subjects:
             self.tree_subjects.insert("", tk.END, values=(sid, name))
         # refresh marks tab input fields if open
         # (optional) we won't auto reload; user should click "Load Subjects"
@@ -0,0 +1,137 @@
+"""
+Bulk import of students and marks from CSV (e.g. saved from Excel).
+
+Expected header:
+    roll,name,course,subject1,subject2,subject3
+
+The marks columns may be left empty to import only the student; subject1..3
+are the first three subjects (repository.subject_ids). Rows are read in
+chunks and each chunk is written in one transaction through repository.py,
+which re-grades the chunk's students. Invalid rows are written to an error
+file (original columns + line number + reason) instead of aborting.
+
+Usage:
+    python importer.py term1.csv --errors rejected.csv --chunk-size 5000
+"""
+
+import argparse
+import csv
+import sys
+import time
+from itertools import islice
+
+import repository
+from app import parse_int
+from database import DB_NAME, retry_on_busy, setup_database, transaction
+
+MARK_COLUMNS = ("subject1", "subject2", "subject3")
+
+
+def parse_row(row):
+    # Returns (student, marks or None); raises ValueError with the reason
+    try:
+        roll = parse_int(row.get("roll") or "", min_value=1)
+    except ValueError as e:
+        raise ValueError(f"roll: {e}") from None
+    name = (row.get("name") or "").strip()
+    course = (row.get("course") or "").strip()
+    if not name or not course:
+        raise ValueError("Name and Course cannot be empty.")
+
+    raw = [(row.get(col) or "").strip() for col in MARK_COLUMNS]
+    if not any(raw):
+        return (roll, name, course), None
+    marks = []
+    for col, value in zip(MARK_COLUMNS, raw):
+        try:
+            marks.append(parse_int(value, 0, 100))
+        except ValueError as e:
+            raise ValueError(f"{col}: {e}") from None
+    return (roll, name, course), marks
+
+
+def write_chunk(db, students, marked):
+    # marked: [(roll, [(subject_id, marks), ...]), ...]
+    with transaction(db):
+        repository.upsert_students(students, db)
+        repository.save_marks(marked, db)
+
+
+def import_csv(path, db=DB_NAME, chunk_size=5000, errors_path=None, delimiter=",", progress=None):
+    """Stream `path` into the database. Returns a stats dict."""
+    stats = {"read": 0, "imported": 0, "rejected": 0, "seconds": 0.0}
+    start = time.perf_counter()
+    err_file = err_writer = None
+    subject_ids = repository.subject_ids(len(MARK_COLUMNS), db)
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f, delimiter=delimiter)
+        missing = {"roll", "name", "course"} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"{path}: missing column(s) {', '.join(sorted(missing))}")
+        numbered = ((reader.line_num, row) for row in reader)
+        try:
+            while True:
+                chunk = list(islice(numbered, chunk_size))
+                if not chunk:
+                    break
+                students, marked = [], []
+                for line, row in chunk:
+                    stats["read"] += 1
+                    try:
+                        student, marks = parse_row(row)
+                    except ValueError as e:
+                        stats["rejected"] += 1
+                        if errors_path:
+                            if err_writer is None:
+                                err_file = open(errors_path, "w", newline="", encoding="utf-8")
+                                err_writer = csv.writer(err_file)
+                                err_writer.writerow([*reader.fieldnames, "line", "reason"])
+                            err_writer.writerow([*(row.get(c) for c in reader.fieldnames),
+                                                 line, str(e)])
+                        continue
+                    students.append(student)
+                    if marks is not None:
+                        marked.append((student[0], list(zip(subject_ids, marks))))
+
+                retry_on_busy(write_chunk, db, students, marked)
+                stats["imported"] += len(students)
+                stats["seconds"] = time.perf_counter() - start
+                if progress:
+                    progress(stats)
+        finally:
+            if err_file:
+                err_file.close()
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def rate(stats):
+    return stats["read"] / stats["seconds"] if stats["seconds"] else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import students and marks from CSV.")
+    parser.add_argument("csv_file")
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--errors", help="write rejected rows to this CSV file")
+    parser.add_argument("--delimiter", default=",")
+    args = parser.parse_args(argv)
+
+    setup_database(args.db)
+
+    def show(stats):
+        print(f"\r{stats['read']} rows read ({rate(stats):.0f} rows/s)", end="", file=sys.stderr)
+
+    stats = import_csv(args.csv_file, args.db, args.chunk_size, args.errors, args.delimiter, show)
+    print(file=sys.stderr)
+    print(f"Imported {stats['imported']} rows, rejected {stats['rejected']} "
+          f"in {stats['seconds']:.2f}s ({rate(stats):.0f} rows/s)")
+    if stats["rejected"] and args.errors:
+        print(f"Rejected rows written to {args.errors}")
+
+
+if __name__ == "__main__":
+    main()
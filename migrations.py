@@ -0,0 +1,429 @@
+"""
+Versioned schema migrations for students.db.
+
+The schema version is stored in PRAGMA user_version. Each entry in
+MIGRATIONS upgrades the database by one version; migrate() runs the ones
+that have not been applied yet, so old students.db files are upgraded in
+place at startup.
+
+The front-ends used to share the file with different tables (database.py:
+students/results, gui.py: students/subjects/marks, admin.py: students with
+s1/s2/s3 columns), so every step only touches the tables that exist.
+Version 4 converts any of those layouts into the one canonical schema
+(SCHEMA below); new files are created in it directly.
+"""
+
+import json
+
+from grading import DEFAULT_BOUNDARIES, PASS_MARK, check_policy, summary_rows
+
+# Indexes per table. Created by the migration for old files and again (IF NOT
+# EXISTS) on every startup, for tables created after the version was bumped.
+INDEXES = {
+    "marks": [
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_marks_roll_subject ON marks(roll, subject_id)",
+        "CREATE INDEX IF NOT EXISTS idx_marks_subject ON marks(subject_id)",
+    ],
+    "mark_results": [
+        "CREATE INDEX IF NOT EXISTS idx_mark_results_percentage ON mark_results(percentage)",
+    ],
+}
+
+
+def table_exists(conn, name):
+    cur = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,))
+    return cur.fetchone() is not None
+
+
+def ensure_indexes(conn):
+    for table, statements in INDEXES.items():
+        if table_exists(conn, table):
+            for sql in statements:
+                conn.execute(sql)
+    ensure_search_index(conn)
+
+
+# Full-text index over the student's name (and course, where the layout has
+# one). External content: the text lives only in students, FTS5 keeps the
+# index, and the triggers below keep it in sync with every write. Rows are
+# matched by rowid: students.id in the canonical schema. Files not yet at
+# version 4 may have an implicit rowid, which VACUUM can renumber; rebuild the
+# index after a VACUUM there (search.rebuild_index).
+SEARCH_COLUMNS = ("name", "course")
+
+
+def search_columns(conn):
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(students)")}
+    return [c for c in SEARCH_COLUMNS if c in cols]
+
+
+def ensure_search_index(conn):
+    if not table_exists(conn, "students") or table_exists(conn, "students_fts"):
+        return
+    cols = search_columns(conn)
+    if not cols:
+        return
+    names = ", ".join(cols)
+    new = ", ".join(f"new.{c}" for c in cols)
+    old = ", ".join(f"old.{c}" for c in cols)
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE students_fts USING fts5(
+            {names}, content='students', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS students_fts_insert AFTER INSERT ON students BEGIN
+            INSERT INTO students_fts(rowid, {names}) VALUES (new.rowid, {new});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS students_fts_delete AFTER DELETE ON students BEGIN
+            INSERT INTO students_fts(students_fts, rowid, {names}) VALUES ('delete', old.rowid, {old});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS students_fts_update AFTER UPDATE OF {names} ON students BEGIN
+            INSERT INTO students_fts(students_fts, rowid, {names}) VALUES ('delete', old.rowid, {old});
+            INSERT INTO students_fts(rowid, {names}) VALUES (new.rowid, {new});
+        END
+    """)
+    conn.execute("INSERT INTO students_fts(students_fts) VALUES ('rebuild')")
+
+
+# ---------- Canonical schema ----------
+# Rolls are TEXT (gui.py allows "007"); id is a stable rowid for the search
+# index and the old admin.py ids. Marks are one row per (roll, subject);
+# mark_results is the per-student summary kept by the write paths.
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS students (
+        id INTEGER PRIMARY KEY,
+        roll TEXT NOT NULL UNIQUE,
+        name TEXT NOT NULL,
+        course TEXT NOT NULL DEFAULT ''
+    )""",
+    # course filters compare with COLLATE NOCASE (repository.filter_clause, ranking)
+    "CREATE INDEX IF NOT EXISTS idx_students_course ON students(course COLLATE NOCASE)",
+    """CREATE TABLE IF NOT EXISTS subjects (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS marks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        roll TEXT NOT NULL REFERENCES students(roll) ON DELETE CASCADE,
+        subject_id INTEGER NOT NULL REFERENCES subjects(id) ON DELETE CASCADE,
+        marks INTEGER NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS mark_results (
+        roll TEXT PRIMARY KEY REFERENCES students(roll) ON DELETE CASCADE,
+        subjects INTEGER NOT NULL,
+        total INTEGER NOT NULL,
+        percentage REAL NOT NULL,
+        grade TEXT NOT NULL,
+        status TEXT NOT NULL
+    )""",
+]
+DEFAULT_SUBJECTS = 3
+
+
+def create_schema(conn):
+    for sql in SCHEMA:
+        conn.execute(sql)
+    first_subjects(conn, DEFAULT_SUBJECTS)
+    ensure_indexes(conn)
+
+
+def first_subjects(conn, count):
+    """Ids of the first `count` subjects, adding SubjectN rows if there are fewer.
+
+    The fixed three-subject front-ends (app.py, admin.py, CSV import) map
+    their subject1..3 onto these.
+    """
+    ids = [sid for sid, in conn.execute("SELECT id FROM subjects ORDER BY id LIMIT ?", (count,))]
+    n = len(ids)
+    while len(ids) < count:
+        n += 1
+        name = f"Subject{n}"
+        if conn.execute("SELECT 1 FROM subjects WHERE name = ?", (name,)).fetchone():
+            continue
+        ids.append(conn.execute("INSERT INTO subjects (name) VALUES (?)", (name,)).lastrowid)
+    return ids
+
+
+def columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def rebuild_mark_results(conn):
+    conn.execute("DELETE FROM mark_results")
+    rows = conn.execute("SELECT roll, COUNT(*), SUM(marks) FROM marks GROUP BY roll")
+    conn.executemany(
+        "INSERT INTO mark_results VALUES (?, ?, ?, ?, ?, ?)",
+        summary_rows(rows.fetchall(), *grading_policy(conn)),
+    )
+
+
+# ---------- Grading policy ----------
+# The grade boundaries and pass mark in force, as JSON in settings, so every
+# process grades new marks the same way. A file without them uses grading's
+# defaults.
+POLICY_KEYS = ("grade_boundaries", "pass_mark")
+
+
+def grading_policy(conn):
+    """(boundaries, pass_mark) stored in the file, else the defaults."""
+    if not table_exists(conn, "settings"):
+        return DEFAULT_BOUNDARIES, PASS_MARK
+    stored = dict(conn.execute("SELECT key, value FROM settings WHERE key IN (?, ?)", POLICY_KEYS).fetchall())
+    boundaries = stored.get("grade_boundaries")
+    pass_mark = stored.get("pass_mark")
+    return (DEFAULT_BOUNDARIES if boundaries is None else tuple((t, g) for t, g in json.loads(boundaries)),
+            PASS_MARK if pass_mark is None else json.loads(pass_mark))
+
+
+def set_grading_policy(conn, boundaries, pass_mark):
+    # validates (ValueError); the stored results are not re-graded here, see repository.regrade
+    boundaries, pass_mark = check_policy(boundaries, pass_mark)
+    conn.executemany("""
+        INSERT INTO settings (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    """, [("grade_boundaries", json.dumps(boundaries)), ("pass_mark", json.dumps(pass_mark))])
+    return boundaries, pass_mark
+
+
+# ---------- Change log ----------
+# Append-only journal of every write to students, subjects, marks and
+# settings (the grading policy), filled by triggers (so writes from any code
+# path are recorded). seq only grows: consumers remember the last seq they
+# processed and ask for the rest (repository.changes_since). old/new are JSON objects of the changed
+# columns. actor comes from the 'actor' row of settings, which
+# database.transaction() writes after BEGIN and deletes before COMMIT; a
+# write from any other tool (sqlite3 shell, DB browser) finds no row and is
+# logged as 'external'.
+SETTINGS = """
+    CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+"""
+
+CHANGE_LOG = """
+    CREATE TABLE IF NOT EXISTS changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+        actor TEXT,
+        table_name TEXT NOT NULL,
+        op TEXT NOT NULL,
+        roll TEXT,
+        subject_id INTEGER,
+        old TEXT,
+        new TEXT
+    )
+"""
+
+ACTOR = "COALESCE((SELECT value FROM settings WHERE key = 'actor'), 'external')"
+
+# table -> (roll column, subject id column, value columns, rows not logged)
+AUDITED = {
+    "students": ("roll", None, ("name", "course"), None),
+    "subjects": (None, "id", ("name",), None),
+    "marks": ("roll", "subject_id", ("marks",), None),
+    # e.g. the grading policy; the actor row is written by every transaction
+    "settings": (None, None, ("key", "value"), "{ref}.key = 'actor'"),
+}
+
+
+def ensure_change_log(conn):
+    conn.execute(SETTINGS)
+    conn.execute(CHANGE_LOG)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_changes_roll ON changes(roll)")
+    for table, (roll, subject, values, skip) in AUDITED.items():
+        def row(ref):
+            keys = f"{ref}.{roll}" if roll else "NULL", f"{ref}.{subject}" if subject else "NULL"
+            obj = "json_object(" + ", ".join(f"'{c}', {ref}.{c}" for c in values) + ")"
+            return keys, obj
+
+        (new_roll, new_subject), new = row("new")
+        (old_roll, old_subject), old = row("old")
+        changed = "(" + " OR ".join(f"old.{c} IS NOT new.{c}" for c in values) + ")"
+        for op, conditions, keys, old_value, new_value in (
+            ("INSERT", [], (new_roll, new_subject), "NULL", new),
+            ("UPDATE", [changed], (new_roll, new_subject), old, new),
+            ("DELETE", [], (old_roll, old_subject), old, "NULL"),
+        ):
+            if skip:
+                conditions = conditions + ["NOT " + skip.format(ref="old" if op == "DELETE" else "new")]
+            when = " WHEN " + " AND ".join(conditions) if conditions else ""
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS changes_{table}_{op.lower()} AFTER {op} ON {table}{when} BEGIN
+                    INSERT INTO changes (actor, table_name, op, roll, subject_id, old, new)
+                    VALUES ({ACTOR}, '{table}', '{op}', {keys[0]}, {keys[1]}, {old_value}, {new_value});
+                END
+            """)
+
+
+def drop_change_triggers(conn):
+    # for bulk loads that should not be logged; ensure_change_log() puts them back
+    for table in AUDITED:
+        for op in ("insert", "update", "delete"):
+            conn.execute(f"DROP TRIGGER IF EXISTS changes_{table}_{op}")
+
+
+# ---------- Migrations ----------
+def _v1_marks_unique_and_indexes(conn):
+    # Keep only the latest mark per (roll, subject) so the unique index can be built
+    if table_exists(conn, "marks"):
+        conn.execute("""
+            DELETE FROM marks WHERE id NOT IN (
+                SELECT MAX(id) FROM marks GROUP BY roll, subject_id
+            )
+        """)
+    ensure_indexes(conn)
+
+
+def _v2_mark_results(conn):
+    # Materialized per-student summary of the marks table, backfilled once
+    if not table_exists(conn, "marks"):
+        return
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS mark_results (
+            roll TEXT PRIMARY KEY,
+            subjects INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            percentage REAL NOT NULL,
+            grade TEXT NOT NULL,
+            status TEXT NOT NULL,
+            FOREIGN KEY (roll) REFERENCES students(roll) ON DELETE CASCADE
+        )
+    """)
+    rows = conn.execute("""
+        SELECT roll, COUNT(*), SUM(marks) FROM marks
+        WHERE roll IN (SELECT roll FROM students)
+        GROUP BY roll
+    """).fetchall()
+    conn.executemany(
+        "INSERT OR REPLACE INTO mark_results VALUES (?, ?, ?, ?, ?, ?)",
+        summary_rows(rows, *grading_policy(conn)),
+    )
+    ensure_indexes(conn)
+
+
+def _v3_students_search(conn):
+    ensure_search_index(conn)
+
+
+def _v4_canonical_schema(conn):
+    # Convert whichever legacy layout(s) the file has into SCHEMA
+    if not table_exists(conn, "students"):
+        create_schema(conn)
+        return
+    old_cols = columns(conn, "students")
+    # the search index and its triggers are rebuilt for the new table afterwards
+    for name in ("insert", "delete", "update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS students_fts_{name}")
+    conn.execute("DROP TABLE IF EXISTS students_fts")
+
+    legacy = [t for t in ("students", "results", "marks", "mark_results") if table_exists(conn, t)]
+    for table in legacy:
+        for index, in conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name=? "
+                                   "AND sql IS NOT NULL", (table,)).fetchall():
+            conn.execute(f"DROP INDEX {index}")
+        conn.execute(f"ALTER TABLE {table} RENAME TO legacy_{table}")
+    create_schema(conn)
+
+    if "roll" in old_cols:
+        course = "COALESCE(course, '')" if "course" in old_cols else "''"
+        keep_id = "id, " if "id" in old_cols else ""
+        conn.execute(f"INSERT INTO students ({keep_id}roll, name, course) "
+                     f"SELECT {keep_id}CAST(roll AS TEXT), COALESCE(name, ''), {course} FROM legacy_students")
+    else:
+        # admin.py layout: the id becomes the roll number
+        conn.execute("INSERT INTO students (id, roll, name, course) "
+                     "SELECT id, CAST(id AS TEXT), COALESCE(name, ''), '' FROM legacy_students")
+
+    # fixed three-column marks (app.py results, admin.py s1..s3) -> first three subjects
+    three = first_subjects(conn, 3)
+    if "results" in legacy:
+        for k, sid in enumerate(three, 1):
+            conn.execute(f"""
+                INSERT OR REPLACE INTO marks (roll, subject_id, marks)
+                SELECT CAST(roll AS TEXT), ?, subject{k} FROM legacy_results
+                WHERE subject{k} IS NOT NULL AND CAST(roll AS TEXT) IN (SELECT roll FROM students)
+            """, (sid,))
+    if "s1" in old_cols:
+        for k, sid in enumerate(three, 1):
+            conn.execute(f"""
+                INSERT OR REPLACE INTO marks (roll, subject_id, marks)
+                SELECT CAST(id AS TEXT), ?, s{k} FROM legacy_students WHERE s{k} IS NOT NULL
+            """, (sid,))
+    if "marks" in legacy:
+        # per-subject rows win over the fixed columns; the latest row per (roll, subject) last
+        conn.execute("""
+            INSERT OR REPLACE INTO marks (roll, subject_id, marks)
+            SELECT CAST(roll AS TEXT), subject_id, marks FROM legacy_marks
+            WHERE CAST(roll AS TEXT) IN (SELECT roll FROM students)
+              AND subject_id IN (SELECT id FROM subjects)
+            ORDER BY id
+        """)
+
+    for table in ("mark_results", "marks", "results", "students"):
+        if table in legacy:
+            conn.execute(f"DROP TABLE legacy_{table}")
+    rebuild_mark_results(conn)
+
+
+def _v5_change_log(conn):
+    # history starts here; existing rows are not back-filled
+    ensure_change_log(conn)
+
+
+def _v6_course_index_nocase(conn):
+    # the course filters are case-insensitive, which a plain index cannot serve
+    conn.execute("DROP INDEX IF EXISTS idx_students_course")
+    conn.execute("CREATE INDEX idx_students_course ON students(course COLLATE NOCASE)")
+
+
+def _v7_actor_from_settings(conn):
+    # the v5 triggers called audit_actor(), a function only our own connections had
+    drop_change_triggers(conn)
+    ensure_change_log(conn)
+
+
+def _v8_settings_change_log(conn):
+    # grading policy changes (settings) are logged like the data they re-grade
+    ensure_change_log(conn)
+
+
+MIGRATIONS = [
+    _v1_marks_unique_and_indexes,
+    _v2_mark_results,
+    _v3_students_search,
+    _v4_canonical_schema,
+    _v5_change_log,
+    _v6_course_index_nocase,
+    _v7_actor_from_settings,
+    _v8_settings_change_log,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+CANONICAL_VERSION = 4   # create_schema() builds this version; later steps apply on top
+
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply pending migrations. Run it inside a transaction so a failing
+    step leaves the file at its previous version."""
+    version = get_version(conn)
+    if version == 0 and not table_exists(conn, "students"):
+        # new file: start at the canonical schema
+        create_schema(conn)
+        version = CANONICAL_VERSION
+        conn.execute(f"PRAGMA user_version = {version}")
+    for number in range(version + 1, SCHEMA_VERSION + 1):
+        MIGRATIONS[number - 1](conn)
+        conn.execute(f"PRAGMA user_version = {number}")
+    ensure_indexes(conn)
+    return get_version(conn)
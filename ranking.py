@@ -0,0 +1,101 @@
+"""
+Rank lookups and top-N leaderboards.
+
+Ranks are by the stored percentage in mark_results. rank_of() answers
+"where does roll X stand" with index range counts on percentage
+(idx_mark_results_percentage), so it never sorts the table. top_n() uses
+the RANK / DENSE_RANK window functions; with the percentage index SQLite
+stops after the first N rows.
+
+Answers are cached per (db, course, ...) in an LRU cache (see
+cache.py). Code that writes results calls invalidate() after committing.
+The cache is per process.
+"""
+
+import os
+
+from cache import LRUCache
+from database import DB_NAME, get_connection
+
+_cache = LRUCache(4096)
+
+
+def invalidate(db=None):
+    """Forget cached ranks (all databases if db is None)."""
+    if db is None:
+        _cache.clear()
+    else:
+        path = os.path.abspath(db)
+        _cache.invalidate_where(lambda key: key[0] == path)
+
+
+def _scope(course):
+    # FROM/WHERE shared by every query: the results joined to students, optionally one course
+    sql = " FROM mark_results r JOIN students s ON s.roll = r.roll"
+    if course is None:
+        return sql, []
+    return sql + " WHERE s.course = ? COLLATE NOCASE", [course]
+
+
+def _rank_of(conn, roll, course):
+    row = conn.execute("SELECT percentage FROM mark_results WHERE roll = ?", (roll,)).fetchone()
+    if row is None:
+        return None
+    percentage = row[0]
+    scope, params = _scope(course)
+    if course is not None:
+        # the roll must belong to the course it is ranked in
+        if conn.execute(f"SELECT 1{scope} AND s.roll = ?", (*params, roll)).fetchone() is None:
+            return None
+        where = " AND"
+    else:
+        scope, where = " FROM mark_results r", " WHERE"   # no join needed for the whole class
+    above, distinct_above = conn.execute(
+        f"SELECT COUNT(*), COUNT(DISTINCT r.percentage){scope}{where} r.percentage > ?",
+        (*params, percentage),
+    ).fetchone()
+    out_of = conn.execute(f"SELECT COUNT(*){scope}", params).fetchone()[0]
+    return {
+        "roll": roll,
+        "percentage": percentage,
+        "rank": above + 1,
+        "dense_rank": distinct_above + 1,
+        # same definition as SQL PERCENT_RANK(): share of the class ranked strictly above
+        "percent_rank": above / (out_of - 1) if out_of > 1 else 0.0,
+        "out_of": out_of,
+    }
+
+
+def rank_of(roll, course=None, db=DB_NAME):
+    """Rank of one roll by percentage (highest first), in the whole class or
+    within `course`. Returns a dict with rank, dense_rank, percent_rank and
+    out_of, or None if the roll has no result (or is not in `course`)."""
+    roll = str(roll)
+    key = (os.path.abspath(db), "rank", course, roll)
+    return _cache.get(key, lambda: _rank_of(get_connection(db), roll, course))
+
+
+LEADERBOARD_COLUMNS = ("rank", "dense_rank", "roll", "name", "course", "total", "percentage", "grade", "status")
+
+
+def _top_n(conn, n, course):
+    scope, params = _scope(course)
+    return conn.execute(f"""
+        SELECT RANK() OVER w, DENSE_RANK() OVER w,
+               s.roll, s.name, s.course, r.total, r.percentage, r.grade, r.status
+        {scope}
+        WINDOW w AS (ORDER BY r.percentage DESC)
+        ORDER BY r.percentage DESC, s.roll
+        LIMIT ?
+    """, (*params, n)).fetchall()
+
+
+def top_n(n=10, course=None, db=DB_NAME):
+    """Leaderboard: the best `n` results (whole class or one course), as
+    rows of LEADERBOARD_COLUMNS. Tied students share a rank."""
+    key = (os.path.abspath(db), "top", course, n)
+    return _cache.get(key, lambda: _top_n(get_connection(db), n, course))
+
+
+def cache_stats():
+    return _cache.stats()
@@ -0,0 +1,324 @@
+"""
+PDF report cards (ReportLab).
+
+A report card is a dict:
+    {"roll", "name", "course", "marks": [(subject, marks), ...],
+     "total", "percentage", "grade", "status"}
+
+iter_cards() streams cards for every student with marks from a single
+cursor over the wide result table (repository.result_table). export_report_cards() renders
+them into a directory on a process pool:
+  - work is sent in batches with a bounded number of batches in flight,
+    so memory stays flat for any class size
+  - files are written to a temp name and renamed, and existing cards are
+    skipped, so an interrupted export can simply be run again
+
+export_zip() packs the same per-student PDFs into one ZIP, and
+export_class_pdf() writes a single multi-page PDF with StreamingPDF. Both
+write entries/pages as cards are read from the cursor, so neither holds
+the whole class in memory.
+
+Usage:
+    python reports.py --out report_cards [--workers 4]
+    python reports.py --format zip --out class.zip
+    python reports.py --format pdf --out class.pdf
+"""
+
+import argparse
+import io
+import os
+import re
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from multiprocessing import get_context
+
+import repository
+from database import DB_NAME, get_connection
+
+
+# ---------- Card sources ----------
+def card_from_row(names, row):
+    # one repository.result_row() row -> card; subjects without marks are left out
+    marks = [(n, m) for n, m in zip(names, row[3:-4]) if m is not None]
+    total, percentage, grade, status = row[-4:]
+    return {"roll": row[0], "name": row[1], "course": row[2], "marks": marks,
+            "total": total, "percentage": percentage, "grade": grade, "status": status}
+
+
+def iter_cards(db=DB_NAME):
+    # every student with marks, by roll; one row per student with a column per subject
+    names = repository.result_columns(db=db)[3:-4]
+    for row in repository.result_table(order="roll", db=db):
+        yield card_from_row(names, row)
+
+
+# ---------- Rendering ----------
+def card_filename(card):
+    safe = re.sub(r"[^A-Za-z0-9_-]", "_", str(card["roll"]))
+    return f"report_{safe}.pdf"
+
+
+def card_lines(card):
+    lines = [f"Roll: {card['roll']}", f"Name: {card['name']}", f"Course: {card['course']}"]
+    lines += [f"{subject}: {m}" for subject, m in card["marks"]]
+    lines += [f"Total: {card['total']}",
+              f"Percentage: {card['percentage']:.2f}",
+              f"Grade: {card['grade']}",
+              f"Status: {card['status']}"]
+    return lines
+
+
+def draw_report_card(c, card):
+    # draw one card on the current page of a ReportLab canvas
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(200, 800, "Student Result")
+
+    c.setFont("Helvetica", 12)
+    y = 760
+    for line in card_lines(card):
+        c.drawString(50, y, line)
+        y -= 20
+
+
+def render_report_card(card, path):
+    # `path` may also be a binary file object
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(path)
+    draw_report_card(c, card)
+    c.save()
+
+
+class StreamingPDF:
+    """Minimal PDF writer that writes each page as soon as it is added.
+
+    ReportLab's canvas keeps every page until save(), so a 100k-page class
+    PDF would be built in memory. Here pages go straight to the file and
+    the xref entries are spooled to a temp file; only counters stay in
+    memory. Text only, with the standard Helvetica fonts.
+    """
+
+    FIRST_PAGE_OBJ = 5   # 1 catalog, 2 page tree, 3-4 fonts
+
+    def __init__(self, path):
+        self.f = open(path, "wb")
+        self.xref = tempfile.TemporaryFile()   # xref lines for objects 3, 4, 5, ...
+        self.pages = 0
+        self.f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+        self._obj(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold >>")
+
+    def _obj(self, num, body):
+        # objects 3.. are written in order; their xref entries are fixed-width lines
+        self.xref.write(b"%010d 00000 n \n" % self.f.tell())
+        self.f.write(b"%d 0 obj\n" % num + body + b"\nendobj\n")
+
+    @staticmethod
+    def _text(s):
+        s = s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        return s.encode("latin-1", "replace")
+
+    def add_page(self, title, lines):
+        ops = [b"BT /F2 18 Tf 200 800 Td (" + self._text(title) + b") Tj ET"]
+        y = 760
+        for line in lines:
+            ops.append(b"BT /F1 12 Tf 50 %d Td (" % y + self._text(line) + b") Tj ET")
+            y -= 20
+        stream = b"\n".join(ops)
+        content = self.FIRST_PAGE_OBJ + 2 * self.pages
+        self._obj(content, b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        self._obj(content + 1, b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                               b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> "
+                               b"/Contents %d 0 R >>" % content)
+        self.pages += 1
+
+    def close(self):
+        # page tree and catalog go last; page object numbers follow from the count
+        pages_at = self.f.tell()
+        self.f.write(b"2 0 obj\n<< /Type /Pages /Count %d /Kids [" % self.pages)
+        for i in range(self.pages):
+            self.f.write(b" %d 0 R" % (self.FIRST_PAGE_OBJ + 2 * i + 1))
+        self.f.write(b" ] >>\nendobj\n")
+        catalog_at = self.f.tell()
+        self.f.write(b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n")
+
+        start = self.f.tell()
+        count = self.FIRST_PAGE_OBJ + 2 * self.pages
+        self.f.write(b"xref\n0 %d\n0000000000 65535 f \n" % count)
+        self.f.write(b"%010d 00000 n \n%010d 00000 n \n" % (catalog_at, pages_at))
+        self.xref.seek(0)
+        while True:
+            chunk = self.xref.read(1 << 16)
+            if not chunk:
+                break
+            self.f.write(chunk)
+        self.f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, start))
+        self.xref.close()
+        self.f.close()
+
+
+def _render_batch(cards, out_dir):
+    # runs in a worker process
+    for card in cards:
+        path = os.path.join(out_dir, card_filename(card))
+        tmp = path + ".part"
+        render_report_card(card, tmp)
+        os.replace(tmp, path)
+    return len(cards)
+
+
+def _render_batch_bytes(cards):
+    # runs in a worker process; returns [(filename, pdf bytes)]
+    out = []
+    for card in cards:
+        buf = io.BytesIO()
+        render_report_card(card, buf)
+        out.append((card_filename(card), buf.getvalue()))
+    return out
+
+
+def _batched(items, batch_size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _done(path, stats):
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        stats["skipped"] += 1
+        return True
+    return False
+
+
+def _pool_run(batches, fn, args, workers, on_result):
+    # at most 2 batches per worker in flight, so memory stays flat
+    # spawn: the caller may be a threaded Tk app, which is unsafe to fork
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        in_flight = set()
+        for batch in batches:
+            in_flight.add(pool.submit(fn, batch, *args))
+            if len(in_flight) >= workers * 2:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for f in finished:
+                    on_result(f.result())
+        while in_flight:
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for f in finished:
+                on_result(f.result())
+
+
+def export_report_cards(cards, out_dir, workers=None, batch_size=50, progress=None, total=None):
+    """Render `cards` (any iterable) into `out_dir` as report_<roll>.pdf.
+
+    `progress(done, total)` is called as batches finish; `total` is only
+    passed through (see count_cards). Returns a stats dict.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    stats = {"rendered": 0, "skipped": 0, "seconds": 0.0}
+    start = time.perf_counter()
+
+    # skip cards already rendered by an earlier (interrupted) run
+    pending = (card for card in cards
+               if not _done(os.path.join(out_dir, card_filename(card)), stats))
+
+    def finished(count):
+        stats["rendered"] += count
+        if progress:
+            progress(stats["rendered"] + stats["skipped"], total)
+
+    _pool_run(_batched(pending, batch_size), _render_batch, (out_dir,),
+              workers or os.cpu_count() or 1, finished)
+    if progress:
+        progress(stats["rendered"] + stats["skipped"], total)
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def export_zip(cards, path, workers=None, batch_size=50, progress=None, total=None):
+    """One ZIP with a report_<roll>.pdf per card, rendered on the process pool.
+
+    Entries are appended as batches come back; only the in-flight batches
+    and the ZIP directory are held in memory.
+    """
+    stats = {"rendered": 0, "skipped": 0, "seconds": 0.0}
+    start = time.perf_counter()
+    tmp = path + ".part"
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+        def finished(files):
+            for name, data in files:
+                zf.writestr(name, data)
+            stats["rendered"] += len(files)
+            if progress:
+                progress(stats["rendered"], total)
+
+        _pool_run(_batched(cards, batch_size), _render_batch_bytes, (),
+                  workers or os.cpu_count() or 1, finished)
+    os.replace(tmp, path)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def export_class_pdf(cards, path, progress=None, total=None, every=100):
+    """One multi-page PDF, a page per card, streamed with StreamingPDF."""
+    stats = {"rendered": 0, "skipped": 0, "seconds": 0.0}
+    start = time.perf_counter()
+    tmp = path + ".part"
+    pdf = StreamingPDF(tmp)
+    try:
+        for card in cards:
+            pdf.add_page("Student Result", card_lines(card))
+            stats["rendered"] += 1
+            if progress and stats["rendered"] % every == 0:
+                progress(stats["rendered"], total)
+    finally:
+        pdf.close()
+    os.replace(tmp, path)
+    if progress:
+        progress(stats["rendered"], total)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def count_cards(db=DB_NAME):
+    # rolls with marks
+    return get_connection(db).execute("SELECT COUNT(*) FROM mark_results").fetchone()[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a PDF report card for every student.")
+    parser.add_argument("--format", choices=("files", "zip", "pdf"), default="files",
+                        help="a PDF per student in a directory, a ZIP of them, or one class PDF")
+    parser.add_argument("--out", default="report_cards", help="output directory or file")
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    total = count_cards(args.db)
+
+    def show(done, total):
+        print(f"\r{done}/{total} report cards", end="", file=sys.stderr)
+
+    cards = iter_cards(args.db)
+    if args.format == "pdf":
+        stats = export_class_pdf(cards, args.out, show, total)
+    elif args.format == "zip":
+        stats = export_zip(cards, args.out, args.workers, args.batch_size, show, total)
+    else:
+        stats = export_report_cards(cards, args.out, args.workers, args.batch_size, show, total)
+    print(file=sys.stderr)
+    rate = stats["rendered"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(f"Rendered {stats['rendered']} report cards, skipped {stats['skipped']} existing "
+          f"in {stats['seconds']:.2f}s ({rate:.1f}/s) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+"""
+All reads and writes of students.db go through here.
+
+One canonical schema (migrations.SCHEMA): students, subjects, marks (one row
+per roll and subject) and mark_results (per-student totals, kept current by
+every write below). app.py, gui.py, admin.py, the importer, the reports and
+the HTTP server all use these functions, so queries, indexes and caches are
+tuned in one place.
+
+Rolls are strings; front-ends with numeric rolls pass str(roll). Every
+function takes the database path (default database.DB_NAME). Write
+functions raise ValueError for bad input and run in one transaction (they
+join the caller's if one is open).
+
+Reads of single students, their marks and the subject list are cached
+(cache.LRUCache) and the write functions invalidate exactly what they
+change once the outermost transaction commits (database.after_commit).
+Writes from other processes are not seen by the caches; sync_caches()
+clears them when database.data_version() changes and the change log shows
+a commit that did not come from this process (database.external_writes),
+and every front-end calls it before re-reading.
+"""
+
+import json
+import os
+import threading
+
+import ranking
+from cache import LRUCache
+from database import (DB_NAME, after_commit, data_version, external_writes, get_connection, keyset_page,
+                      transaction)
+from grading import summary_rows
+from migrations import first_subjects, grading_policy, migrate, set_grading_policy
+
+student_cache = LRUCache(1024)    # (db, roll) -> (roll, name, course) or None
+marks_cache = LRUCache(1024)      # (db, roll) -> ((subject, marks), ...)
+subjects_cache = LRUCache(16)     # db -> ((id, name), ...)
+result_cache = LRUCache(1024)     # (db, roll, subject_ids) -> wide result row or None
+
+
+def init(db=DB_NAME):
+    """Create the schema in a new file, or upgrade an old one in place."""
+    with transaction(db) as conn:
+        migrate(conn)
+
+
+def _path(db):
+    return os.path.abspath(db)
+
+
+def _invalidate(db, rolls=(), subjects=False):
+    # after the outermost transaction commits: a write may be joining the caller's
+    after_commit(db, lambda: _drop(db, list(rolls), subjects))
+
+
+def _drop(db, rolls, subjects):
+    path = _path(db)
+    keys = [(path, roll) for roll in rolls]
+    student_cache.invalidate(*keys)
+    marks_cache.invalidate(*keys)
+    result_cache.invalidate_where(lambda key: key[0] == path and (subjects or key[1] in rolls))
+    if subjects:
+        subjects_cache.invalidate(path)
+        marks_cache.invalidate_where(lambda key: key[0] == path)
+    ranking.invalidate(db)
+
+
+def clear_caches():
+    for cache in (student_cache, marks_cache, subjects_cache, result_cache):
+        cache.clear()
+    ranking.invalidate()
+
+
+_seen = threading.local()   # db path -> (data_version, change-log seq) this thread last synced at
+
+
+def sync_caches(db=DB_NAME):
+    """Clear the caches if another process committed to db since this
+    thread last looked, and return its data_version. Commits from this
+    process's other threads (e.g. the TaskRunner's) invalidated what they
+    changed already and do not clear. A thread's first call always clears,
+    since other threads may have cached before it connected."""
+    versions = getattr(_seen, "versions", None)
+    if versions is None:
+        versions = _seen.versions = {}
+    version = data_version(db)
+    seen = versions.get(_path(db))
+    if seen is None:
+        seq, external = external_writes(db)[0], True
+    elif seen[0] != version:
+        seq, external = external_writes(db, seen[1])
+    else:
+        seq, external = seen[1], False
+    if external:
+        clear_caches()
+    versions[_path(db)] = (version, seq)
+    return version
+
+
+def cache_stats():
+    # hit/miss counters per cache
+    return {"students": student_cache.stats(), "marks": marks_cache.stats(),
+            "subjects": subjects_cache.stats(), "results": result_cache.stats(),
+            "ranks": ranking.cache_stats()}
+
+
+def check_marks(value):
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= 100:
+        raise ValueError(f"Marks must be a whole number from 0 to 100, got {value!r}")
+    return value
+
+
+# ---------- Students ----------
+def get_student(roll, db=DB_NAME):
+    # primary-key lookup; returns (roll, name, course) or None
+    roll = str(roll)
+    return student_cache.get((_path(db), roll), lambda: get_connection(db).execute(
+        "SELECT roll, name, course FROM students WHERE roll = ?", (roll,)).fetchone())
+
+
+def student_exists(roll, db=DB_NAME):
+    return get_student(roll, db) is not None
+
+
+def add_students(records, db=DB_NAME):
+    """Insert [(roll, name, course), ...]; nothing is written if any is invalid."""
+    records = [(str(roll), name, course or "") for roll, name, course in records]
+    seen = set()
+    with transaction(db) as conn:
+        for roll, name, course in records:
+            if not roll or not name:
+                raise ValueError(f"Roll {roll}: Roll and Name cannot be empty.")
+            if roll in seen:
+                raise ValueError(f"Roll {roll}: Roll number appears more than once.")
+            seen.add(roll)
+            if conn.execute("SELECT 1 FROM students WHERE roll = ?", (roll,)).fetchone():
+                raise ValueError(f"Roll {roll}: Roll number already exists.")
+        conn.executemany("INSERT INTO students (roll, name, course) VALUES (?, ?, ?)", records)
+    _invalidate(db, [r[0] for r in records])
+    return len(records)
+
+
+def upsert_students(records, db=DB_NAME):
+    # insert or update name/course (bulk import); marks are kept
+    records = [(str(roll), name, course or "") for roll, name, course in records]
+    with transaction(db) as conn:
+        conn.executemany("""
+            INSERT INTO students (roll, name, course) VALUES (?, ?, ?)
+            ON CONFLICT(roll) DO UPDATE SET name = excluded.name, course = excluded.course
+        """, records)
+    _invalidate(db, [r[0] for r in records])
+    return len(records)
+
+
+def next_roll(db=DB_NAME):
+    # for front-ends that number students automatically (admin.py)
+    row = get_connection(db).execute(
+        "SELECT MAX(CAST(roll AS INTEGER)) FROM students WHERE roll GLOB '[0-9]*'").fetchone()
+    return str((row[0] or 0) + 1)
+
+
+def delete_students(rolls, db=DB_NAME, missing_ok=False):
+    # marks and mark_results go with them (ON DELETE CASCADE)
+    rolls = [str(r) for r in rolls]
+    with transaction(db) as conn:
+        for roll in rolls:
+            if conn.execute("DELETE FROM students WHERE roll = ?", (roll,)).rowcount == 0 and not missing_ok:
+                raise ValueError(f"Roll {roll}: Student not found.")
+    _invalidate(db, rolls)
+    return len(rolls)
+
+
+def list_students_page(after=None, before=None, limit=200, db=DB_NAME):
+    # one keyset page of students ordered by roll (see database.keyset_page)
+    return keyset_page(db, "SELECT roll, name, course FROM students", "roll", after, before, limit)
+
+
+def filter_clause(filters):
+    # {"s.course": "CSE", "r.grade": None, ...} -> (" WHERE s.course = ?", ["CSE"]); None means no filter
+    used = [(col, val) for col, val in filters.items() if val is not None]
+    if not used:
+        return "", []
+    return " WHERE " + " AND ".join(f"{col} = ? COLLATE NOCASE" for col, _ in used), [v for _, v in used]
+
+
+# numeric rolls in numeric order ("2" before "10"), then the rest
+ROLL_ORDER = "length(s.roll), s.roll"
+
+
+def query_students(course=None, limit=None, offset=0, db=DB_NAME):
+    where, params = filter_clause({"s.course": course})
+    return get_connection(db).execute(
+        f"SELECT s.roll, s.name, s.course FROM students s{where} ORDER BY {ROLL_ORDER} LIMIT ? OFFSET ?",
+        (*params, -1 if limit is None else limit, offset),
+    )
+
+
+# ---------- Subjects ----------
+def get_subjects(db=DB_NAME):
+    return subjects_cache.get(_path(db), lambda: tuple(get_connection(db).execute(
+        "SELECT id, name FROM subjects ORDER BY id").fetchall()))
+
+
+def subject_ids(count, db=DB_NAME):
+    """Ids of the first `count` subjects (created if missing), for the
+    fixed subject1..3 front-ends."""
+    ids = [sid for sid, _ in get_subjects(db)][:count]
+    if len(ids) < count:
+        with transaction(db) as conn:
+            ids = first_subjects(conn, count)
+        _invalidate(db, subjects=True)
+    return ids
+
+
+def add_subject(name, db=DB_NAME):
+    name = name.strip()
+    if not name:
+        raise ValueError("Subject name cannot be empty.")
+    with transaction(db) as conn:
+        if conn.execute("SELECT 1 FROM subjects WHERE name = ?", (name,)).fetchone():
+            raise ValueError(f"Subject '{name}' already exists.")
+        sid = conn.execute("INSERT INTO subjects (name) VALUES (?)", (name,)).lastrowid
+    _invalidate(db, subjects=True)
+    return sid
+
+
+def remove_subject(sid, db=DB_NAME):
+    # its marks go with it (ON DELETE CASCADE); the affected totals are recomputed
+    with transaction(db) as conn:
+        affected = [r for r, in conn.execute("SELECT DISTINCT roll FROM marks WHERE subject_id = ?", (sid,))]
+        conn.execute("DELETE FROM subjects WHERE id = ?", (sid,))
+        refresh_mark_results(conn, affected)
+    _invalidate(db, affected, subjects=True)
+
+
+# ---------- Marks ----------
+def refresh_mark_results(conn, rolls):
+    # recompute the stored summary for the given rolls only (call inside the write transaction)
+    rolls = list(set(rolls))
+    policy = grading_policy(conn)
+    for i in range(0, len(rolls), 500):
+        chunk = rolls[i:i + 500]
+        q = ",".join("?" * len(chunk))
+        rows = conn.execute(f"SELECT roll, COUNT(*), SUM(marks) FROM marks WHERE roll IN ({q}) GROUP BY roll",
+                            chunk).fetchall()
+        conn.execute(f"DELETE FROM mark_results WHERE roll IN ({q})", chunk)
+        conn.executemany("INSERT INTO mark_results VALUES (?, ?, ?, ?, ?, ?)", summary_rows(rows, *policy))
+
+
+MARK_UPSERT_SQL = """
+    INSERT INTO marks (roll, subject_id, marks) VALUES (?, ?, ?)
+    ON CONFLICT(roll, subject_id) DO UPDATE SET marks = excluded.marks
+"""
+
+
+def get_marks(roll, db=DB_NAME):
+    # ((subject name, marks), ...) in subject order
+    roll = str(roll)
+    return marks_cache.get((_path(db), roll), lambda: tuple(get_connection(db).execute("""
+        SELECT s.name, m.marks FROM marks m
+        JOIN subjects s ON m.subject_id = s.id
+        WHERE m.roll = ?
+        ORDER BY s.id
+    """, (roll,)).fetchall()))
+
+
+def save_marks(records, db=DB_NAME, replace=False):
+    """Add or update marks: records is [(roll, [(subject_id, marks), ...]), ...].
+
+    With replace=True a roll's other subjects are removed. One transaction;
+    every roll must exist. Returns the number of students written.
+    """
+    records = [(str(roll), [(sid, check_marks(m)) for sid, m in marks]) for roll, marks in records]
+    if not records:
+        return 0
+    with transaction(db) as conn:
+        for roll, _ in records:
+            if not conn.execute("SELECT 1 FROM students WHERE roll = ?", (roll,)).fetchone():
+                raise ValueError(f"Roll {roll}: Student not found. Add the student first.")
+        rolls = [roll for roll, _ in records]
+        if replace:
+            # drop only the subjects not in the new set, so kept ones are logged as updates
+            for roll, marks in records:
+                keep = [sid for sid, _ in marks]
+                conn.execute(f"DELETE FROM marks WHERE roll = ? AND subject_id NOT IN ({','.join('?' * len(keep))})",
+                             (roll, *keep))
+        conn.executemany(MARK_UPSERT_SQL, [(roll, sid, m) for roll, marks in records for sid, m in marks])
+        refresh_mark_results(conn, rolls)
+    _invalidate(db, rolls)
+    return len(records)
+
+
+def add_mark(roll, subject_id, marks, db=DB_NAME):
+    save_marks([(roll, [(subject_id, marks)])], db)
+
+
+# ---------- Results ----------
+RESULT_SUMMARY_COLUMNS = ("roll", "name", "course", "total", "percentage", "grade", "status")
+
+
+def get_result(roll, db=DB_NAME):
+    # stored (total, percentage, grade, status) or None
+    return get_connection(db).execute(
+        "SELECT total, percentage, grade, status FROM mark_results WHERE roll = ?", (str(roll),)).fetchone()
+
+
+def query_results(course=None, grade=None, status=None, limit=None, offset=0, db=DB_NAME):
+    # best first (uses idx_mark_results_percentage); rows of RESULT_SUMMARY_COLUMNS
+    where, params = filter_clause({"s.course": course, "r.grade": grade, "r.status": status})
+    return get_connection(db).execute(f"""
+        SELECT s.roll, s.name, s.course, r.total, r.percentage, r.grade, r.status
+        FROM students s
+        JOIN mark_results r ON s.roll = r.roll{where}
+        ORDER BY r.percentage DESC
+        LIMIT ? OFFSET ?
+    """, (*params, -1 if limit is None else limit, offset))
+
+
+# ---------- Wide results: one row per student, one column per subject ----------
+# Pivoted in SQL (GROUP BY roll with a conditional aggregate per subject), so
+# a page, a search result or the whole class is one query whatever the number
+# of subjects. `ids` picks and orders the subject columns (default: all).
+def _ids(ids, db):
+    return tuple(sid for sid, _ in get_subjects(db)) if ids is None else tuple(ids)
+
+
+def result_columns(ids=None, db=DB_NAME):
+    # column names for result rows: subject names in the middle
+    names = dict(get_subjects(db))
+    return ("roll", "name", "course", *(names[sid] for sid in _ids(ids, db)),
+            "total", "percentage", "grade", "status")
+
+
+def _wide_sql(ids, source="students s", where="", tail="ORDER BY s.roll"):
+    cols = "".join(f", MAX(CASE WHEN m.subject_id = {int(sid)} THEN m.marks END)" for sid in ids)
+    return f"""
+        SELECT s.roll, s.name, s.course{cols}, r.total, r.percentage, r.grade, r.status
+        FROM {source}
+        LEFT JOIN marks m ON m.roll = s.roll
+        LEFT JOIN mark_results r ON r.roll = s.roll{where}
+        GROUP BY s.roll
+        {tail}
+    """
+
+
+def result_row(roll, ids=None, db=DB_NAME):
+    """(roll, name, course, marks per subject..., total, percentage, grade,
+    status) or None if there is no such roll. Marks not entered are None."""
+    roll, ids = str(roll), _ids(ids, db)
+    return result_cache.get((_path(db), roll, ids), lambda: get_connection(db).execute(
+        _wide_sql(ids, where=" WHERE s.roll = ?", tail=""), (roll,)).fetchone())
+
+
+def result_rows(rolls, ids=None, db=DB_NAME):
+    """result_row() for many rolls in one query, ordered by roll (e.g. search hits)."""
+    rolls = [str(r) for r in rolls]
+    if not rolls:
+        return []
+    q = ",".join("?" * len(rolls))
+    return get_connection(db).execute(_wide_sql(_ids(ids, db), where=f" WHERE s.roll IN ({q})"),
+                                      rolls).fetchall()
+
+
+def result_page(ids=None, after=None, before=None, limit=200, db=DB_NAME):
+    """One keyset page (by roll) of result_row() rows."""
+    if before is not None:
+        page, params = "SELECT * FROM students WHERE roll < ? ORDER BY roll DESC LIMIT ?", (str(before), limit)
+    elif after is not None:
+        page, params = "SELECT * FROM students WHERE roll > ? ORDER BY roll LIMIT ?", (str(after), limit)
+    else:
+        page, params = "SELECT * FROM students ORDER BY roll LIMIT ?", (limit,)
+    return get_connection(db).execute(_wide_sql(_ids(ids, db), f"({page}) s"), params).fetchall()
+
+
+TABLE_ORDER = {"rank": "r.percentage DESC, s.roll", "roll": "s.roll"}
+
+
+def result_table(course=None, grade=None, status=None, limit=None, offset=0, ids=None, order="rank",
+                 db=DB_NAME):
+    """Class-wide table for listings and exports: result_row() rows of the
+    students with results, filtered like query_results(), best first
+    (order="rank") or by roll. A cursor; read it in batches."""
+    where, params = filter_clause({"s.course": course, "r.grade": grade, "r.status": status})
+    where = (where + " AND" if where else " WHERE") + " r.roll IS NOT NULL"
+    return get_connection(db).execute(
+        _wide_sql(_ids(ids, db), where=where, tail=f"ORDER BY {TABLE_ORDER[order]} LIMIT ? OFFSET ?"),
+        (*params, -1 if limit is None else limit, offset))
+
+
+def get_grading_policy(db=DB_NAME):
+    # (boundaries highest first, pass_mark) in force for db
+    return grading_policy(get_connection(db))
+
+
+def regrade(boundaries=None, pass_mark=None, db=DB_NAME):
+    """Store a new grading policy and re-grade every stored result with it,
+    in one transaction. None keeps that part of the current policy.
+    Raises ValueError for an invalid policy. Returns (boundaries,
+    pass_mark, number of results)."""
+    with transaction(db) as conn:
+        current = grading_policy(conn)
+        policy = set_grading_policy(conn, current[0] if boundaries is None else boundaries,
+                                    current[1] if pass_mark is None else pass_mark)
+        rows = summary_rows(conn.execute("SELECT roll, subjects, total FROM mark_results").fetchall(), *policy)
+        conn.executemany("UPDATE mark_results SET grade = ?, status = ? WHERE roll = ?",
+                         [(grade, status, roll) for roll, _, _, _, grade, status in rows])
+    path = _path(db)
+
+    def drop():
+        # every result row may have a new grade; students, marks and subjects are unchanged
+        result_cache.invalidate_where(lambda key: key[0] == path)
+        ranking.invalidate(db)
+
+    after_commit(db, drop)
+    return (*policy, len(rows))
+
+
+# ---------- Change log ----------
+# Filled by triggers on students, subjects and marks (migrations.CHANGE_LOG).
+CHANGE_COLUMNS = ("seq", "at", "actor", "table", "op", "roll", "subject_id", "old", "new")
+
+
+def _change(row):
+    seq, at, actor, table, op, roll, subject_id, old, new = row
+    return {"seq": seq, "at": at, "actor": actor, "table": table, "op": op, "roll": roll,
+            "subject_id": subject_id, "old": json.loads(old) if old else None, "new": json.loads(new) if new else None}
+
+
+def changes_since(seq=0, limit=1000, roll=None, db=DB_NAME):
+    """Changes after sequence number `seq`, oldest first, at most `limit`, as
+    dicts of CHANGE_COLUMNS. To sync incrementally, keep the last "seq" you
+    processed and pass it next time; an empty list means you are current."""
+    where, params = "WHERE seq > ?", [seq]
+    if roll is not None:
+        where, params = where + " AND roll = ?", params + [str(roll)]
+    rows = get_connection(db).execute(
+        f"SELECT seq, at, actor, table_name, op, roll, subject_id, old, new FROM changes {where} "
+        f"ORDER BY seq LIMIT ?", (*params, limit)).fetchall()
+    return [_change(r) for r in rows]
+
+
+def last_change(db=DB_NAME):
+    # the newest sequence number (0 if nothing has changed yet)
+    return get_connection(db).execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
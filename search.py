@@ -0,0 +1,51 @@
+"""
+Search students by name / course as you type.
+
+Backed by the students_fts FTS5 index (see migrations.ensure_search_index),
+which triggers keep in sync with the students table. Every word typed is a
+prefix, and all of them must match: "pri cse" finds Priya / Prithvi in
+CSE. Results are limited, so a query costs the same on 100 students or
+100,000.
+"""
+
+import re
+
+from database import DB_NAME, get_connection, transaction
+from migrations import ensure_search_index, table_exists
+
+DEFAULT_LIMIT = 50
+
+
+def match_expression(text):
+    """Turn free text into an FTS5 query: each word a quoted prefix term."""
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def search_students(text, columns=("roll", "name", "course"), key="roll", limit=DEFAULT_LIMIT, db=DB_NAME):
+    """Rows of `columns` for the best `limit` matches of `text`, ordered by `key`.
+
+    `columns` and `key` are column names of students chosen by the caller,
+    never user input.
+    """
+    expression = match_expression(text)
+    if not expression:
+        return []
+    conn = get_connection(db)
+    if not table_exists(conn, "students_fts"):
+        # a file that was never migrated (see migrations.ensure_search_index)
+        with transaction(db) as conn:
+            ensure_search_index(conn)
+    return conn.execute(f"""
+        SELECT {", ".join(columns)} FROM students
+        WHERE rowid IN (
+            SELECT rowid FROM students_fts WHERE students_fts MATCH ? ORDER BY rank LIMIT ?
+        )
+        ORDER BY {key}
+    """, (expression, limit)).fetchall()
+
+
+def rebuild_index(db=DB_NAME):
+    # re-create the index from the students table (e.g. after VACUUM)
+    with transaction(db) as conn:
+        conn.execute("INSERT INTO students_fts(students_fts) VALUES ('rebuild')")
@@ -0,0 +1,211 @@
+"""
+Read-only HTTP/JSON API for results, for students and other systems.
+
+    python server.py --host 127.0.0.1 --port 8080 --workers 4
+
+    GET /results/<roll>        one student's result        (app.fetch_result)
+    GET /results?course=CSE&grade=A&status=PASS&limit=50&offset=0
+                               results, best first          (repository.query_results)
+                               &wide=1 adds every subject's marks (repository.result_table)
+    GET /marks/<roll>          marks per subject            (repository.get_marks)
+    GET /changes?since=120&limit=500
+                               change log after a sequence number (repository.changes_since)
+    GET /health
+
+asyncio handles the connections (HTTP/1.1 keep-alive); the database calls
+run on a bounded thread pool, each worker thread with its own pooled
+connection (database.get_connection). Every response has an ETag; a
+request with a matching If-None-Match gets 304 Not Modified without a body.
+
+The lookups are cached in-process (repository.py caches, see cache.py);
+repository.sync_caches() clears them when PRAGMA data_version shows that
+another process (the GUI, the admin dashboard, app.py) has written.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import app
+import repository
+from database import DB_NAME
+
+MAX_LIMIT = 1000
+
+
+class NotFound(Exception):
+    pass
+
+
+def _int_param(params, name, default, min_value=0, max_value=None):
+    if name not in params:
+        return default
+    return app.parse_int(params[name][-1], min_value, max_value)   # ValueError -> 400
+
+
+def _text_param(params, name):
+    return params[name][-1] if name in params else None
+
+
+# ---------- Routes (run on the thread pool) ----------
+def get_result(roll):
+    row = app.fetch_result(roll)
+    if row is None:
+        raise NotFound(f"Roll {roll} not found")
+    return dict(zip(app.result_columns(), row))
+
+
+def list_results(params):
+    limit = _int_param(params, "limit", 100, 1, MAX_LIMIT)
+    offset = _int_param(params, "offset", 0)
+    status = _text_param(params, "status")
+    filters = (_text_param(params, "course"), _text_param(params, "grade"), status.upper() if status else None)
+    if _text_param(params, "wide") in ("1", "true"):
+        columns, rows = repository.result_columns(), repository.result_table(*filters, limit, offset).fetchall()
+    else:
+        columns, rows = repository.RESULT_SUMMARY_COLUMNS, repository.query_results(*filters, limit, offset).fetchall()
+    return {"limit": limit, "offset": offset, "results": [dict(zip(columns, r)) for r in rows]}
+
+
+def get_marks(roll):
+    if repository.get_student(roll) is None:
+        raise NotFound(f"Roll {roll} not found")
+    return {"roll": roll, "marks": [{"subject": s, "marks": m} for s, m in repository.get_marks(roll)]}
+
+
+def list_changes(params):
+    since = _int_param(params, "since", 0)
+    changes = repository.changes_since(since, _int_param(params, "limit", 500, 1, MAX_LIMIT))
+    return {"changes": changes, "last": changes[-1]["seq"] if changes else since}
+
+
+def route(path, params):
+    """Dispatch one GET. Returns a JSON-able object; raises NotFound / ValueError."""
+    # runs on the worker thread before each query
+    repository.sync_caches(DB_NAME)
+    parts = [unquote(p) for p in path.strip("/").split("/")]
+    if parts == ["health"]:
+        return {"status": "ok"}
+    if parts == ["results"]:
+        return list_results(params)
+    if parts == ["changes"]:
+        return list_changes(params)
+    if len(parts) == 2 and parts[0] == "results":
+        return get_result(parts[1])
+    if len(parts) == 2 and parts[0] == "marks":
+        return get_marks(parts[1])
+    raise NotFound(f"No such endpoint: {path}")
+
+
+# ---------- HTTP ----------
+class Server:
+    def __init__(self, workers=4, queue_limit=None):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-db")
+        # bound the requests waiting for a worker; the rest wait in asyncio
+        self.slots = asyncio.Semaphore(queue_limit or workers * 4)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    await self.send(writer, HTTPStatus.BAD_REQUEST, {"error": "Bad request line"}, close=True)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                length = headers.get("content-length") or "0"
+                if not length.isdecimal():
+                    await self.send(writer, HTTPStatus.BAD_REQUEST, {"error": "Bad Content-Length"}, close=True)
+                    break
+                if int(length):
+                    try:
+                        await reader.readexactly(int(length))   # ignored: GET only
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        break
+                close = (headers.get("connection", "").lower() == "close"
+                         or (version == "HTTP/1.0" and headers.get("connection", "").lower() != "keep-alive"))
+                await self.respond(writer, method, target, headers, close)
+                if close:
+                    break
+        except ConnectionError:
+            pass   # client went away while the response was written (reset / broken pipe)
+        finally:
+            writer.close()
+
+    async def respond(self, writer, method, target, headers, close):
+        if method not in ("GET", "HEAD"):
+            await self.send(writer, HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Read-only API: use GET"},
+                            close=close, extra={"Allow": "GET, HEAD"})
+            return
+        url = urlsplit(target)
+        async with self.slots:
+            try:
+                body = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, route, url.path, parse_qs(url.query))
+                status = HTTPStatus.OK
+            except NotFound as e:
+                status, body = HTTPStatus.NOT_FOUND, {"error": str(e)}
+            except ValueError as e:
+                status, body = HTTPStatus.BAD_REQUEST, {"error": str(e)}
+            except Exception as e:
+                status, body = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+        await self.send(writer, status, body, close=close, head=method == "HEAD",
+                        if_none_match=headers.get("if-none-match"))
+
+    async def send(self, writer, status, body, close=False, head=False, if_none_match=None, extra=None):
+        payload = json.dumps(body, separators=(",", ":")).encode()
+        etag = '"' + hashlib.blake2b(payload, digest_size=12).hexdigest() + '"'
+        fields = {"Content-Type": "application/json", "ETag": etag, "Cache-Control": "no-cache"}
+        if status == HTTPStatus.OK and if_none_match and etag in (t.strip() for t in if_none_match.split(",")):
+            status, payload = HTTPStatus.NOT_MODIFIED, b""
+            del fields["Content-Type"]
+        else:
+            fields["Content-Length"] = str(len(payload))
+        if close:
+            fields["Connection"] = "close"
+        fields.update(extra or {})
+        head_lines = [f"HTTP/1.1 {status.value} {status.phrase}"] + [f"{k}: {v}" for k, v in fields.items()]
+        writer.write(("\r\n".join(head_lines) + "\r\n\r\n").encode("latin-1"))
+        if not head:
+            writer.write(payload)
+        await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=8080, workers=4, ready=None):
+    app.setup_database()
+    handler = Server(workers)
+    server = await asyncio.start_server(handler.handle, host, port)
+    if ready is not None:
+        ready(server)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read-only HTTP/JSON API for student results.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4, help="database threads")
+    args = parser.parse_args(argv)
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Run database work off the Tkinter thread.
+
+TaskRunner executes functions on a small thread pool and hands their
+results back to Tk through a queue polled with `after()`, so callbacks
+(on_done / on_error / on_progress) always run on the UI thread. Each
+worker thread uses its own pooled SQLite connection (see
+database.get_connection). A task that fails with "database is locked"
+(another window or process writing) is retried with backoff
+(database.retry_on_busy) before its error is reported.
+
+Tasks submitted with the same `key` supersede each other: when Refresh is
+hit twice, the first request is cancelled if it has not started yet and
+its result is dropped if it has.
+"""
+
+import itertools
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from database import retry_on_busy
+
+
+class TaskRunner:
+    def __init__(self, root, max_workers=2, poll_ms=50, on_busy=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_busy = on_busy   # called on the UI thread with the number of pending tasks
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self._queue = queue.Queue()
+        self._ids = itertools.count(1)
+        self._latest = {}    # key -> id of the newest task for that key
+        self._futures = {}   # key -> future of the newest task for that key
+        self._closed = False
+        self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, fn, *args, on_done=None, on_error=None, on_progress=None, key=None, **kwargs):
+        """Run fn(*args, **kwargs) in the pool.
+
+        With `on_progress`, fn also receives a `progress(done, total)`
+        callable it can call from the worker thread.
+        """
+        task_id = next(self._ids)
+        if key is not None:
+            old = self._futures.get(key)
+            if old is not None:
+                old.cancel()
+            self._latest[key] = task_id
+        if on_progress is not None:
+            kwargs["progress"] = lambda *a: self._queue.put((task_id, key, on_progress, a))
+
+        def run():
+            try:
+                result = retry_on_busy(fn, *args, **kwargs)
+            except Exception as e:
+                if on_error is not None:
+                    self._queue.put((task_id, key, on_error, (e,)))
+                else:
+                    self._queue.put((task_id, key, self.report_error, (e,)))
+                return
+            if on_done is not None:
+                self._queue.put((task_id, key, on_done, (result,)))
+
+        future = self._executor.submit(run)
+        # also fires for cancelled tasks, so the pending count never leaks
+        future.add_done_callback(lambda f: self._queue.put((None, None, self._finished, ())))
+        if key is not None:
+            self._futures[key] = future
+        self._set_pending(self.pending + 1)
+        return future
+
+    def _finished(self):
+        self._set_pending(self.pending - 1)
+
+    def _set_pending(self, count):
+        self.pending = count
+        if self.on_busy is not None:
+            self.on_busy(count)
+
+    def is_stale(self, task_id, key):
+        return key is not None and self._latest.get(key) != task_id
+
+    def _poll(self):
+        if self._closed:
+            return
+        try:
+            while True:
+                try:
+                    task_id, key, callback, args = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if not self.is_stale(task_id, key):
+                    callback(*args)
+        finally:
+            self.root.after(self.poll_ms, self._poll)
+
+    def report_error(self, exc):
+        # default on_error: show it instead of losing it in the worker thread
+        from tkinter import messagebox
+        messagebox.showerror("Error", str(exc))
+
+    def shutdown(self):
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
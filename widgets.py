@@ -0,0 +1,224 @@
+"""
+Shared Tkinter widgets for gui.py and admin.py.
+
+PagedTreeview shows one page of a large table at a time. Pages are loaded
+with keyset pagination (see database.keyset_page), so only the visible rows
+are fetched from SQLite and inserted into the Treeview. Given a
+tasks.TaskRunner, pages are fetched on a worker thread.
+
+Items use the row key as their Treeview iid, so a reload is applied as a
+diff (insert / update / delete only the rows that changed), and a single
+edit can be applied with upsert_row() / remove_row() without reloading.
+
+SearchBox is an Entry that reports what was typed once typing pauses, for
+search-as-you-type without a query per keystroke.
+"""
+
+import tkinter as tk
+from bisect import bisect_left
+from tkinter import ttk
+
+
+class PagedTreeview(ttk.Frame):
+    """Treeview + Prev/Next bar over a keyset-paginated query.
+
+    `fetch_page(after=None, before=None, limit=...)` must return rows in
+    ascending key order, with the key in column `key_index`. The inner
+    Treeview is available as `.tree`; item iids are str(key).
+    """
+
+    def __init__(self, master, columns, fetch_page, page_size=200, key_index=0, runner=None, **kw):
+        super().__init__(master, **kw)
+        self.fetch_page = fetch_page
+        self.runner = runner
+        self.page_size = page_size
+        self.key_index = key_index
+        self.page = 1
+        self._cursor = {}   # kwargs that loaded the current page, reused by refresh()
+        self._rows = []     # displayed rows, ascending by key
+        self._keys = []
+        self._has_prev = self._has_next = False
+        self._filter = None  # set_filter(): show these rows instead of pages
+
+        bar = ttk.Frame(self)
+        bar.pack(side="bottom", fill="x")
+        self.btn_prev = ttk.Button(bar, text="< Prev", command=self.prev_page)
+        self.btn_prev.pack(side="left")
+        self.lbl_page = ttk.Label(bar)
+        self.lbl_page.pack(side="left", padx=10)
+        self.btn_next = ttk.Button(bar, text="Next >", command=self.next_page)
+        self.btn_next.pack(side="left")
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings")
+        scroll = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        scroll.pack(side="right", fill="y")
+        self.tree.pack(fill="both", expand=True)
+
+    def iid(self, key):
+        return str(key)
+
+    def _load(self, page, **cursor):
+        # fetch one extra row to know whether there is a next page
+        fetch = self._filter or self.fetch_page
+        if self.runner is None:
+            self._show(page, cursor, fetch(limit=self.page_size + 1, **cursor))
+        else:
+            # a newer load (same key) supersedes one still in flight
+            self.runner.submit(fetch, limit=self.page_size + 1, key=("page", id(self)),
+                               on_done=lambda rows: self._show(page, cursor, rows), **cursor)
+
+    def _show(self, page, cursor, rows):
+        if self._filter is not None:
+            # one page of matches, ascending by key; no paging
+            rows = rows[:self.page_size]
+            self._has_prev = self._has_next = False
+        elif "before" in cursor:
+            self._has_prev = len(rows) > self.page_size
+            rows = rows[-self.page_size:]
+            self._has_next = True
+        else:
+            self._has_next = len(rows) > self.page_size
+            rows = rows[:self.page_size]
+            self._has_prev = page > 1
+        self.page = page
+        self._cursor = cursor
+        self._apply(rows)
+        self._update_bar()
+
+    def _apply(self, rows):
+        # diff the new page against what is displayed; untouched rows cost nothing
+        old = dict(zip(map(self.iid, self._keys), self._rows))
+        new_iids = [self.iid(r[self.key_index]) for r in rows]
+        keep = set(new_iids)
+        stale = [iid for iid in old if iid not in keep]
+        if stale:
+            self.tree.delete(*stale)
+        for index, (iid, row) in enumerate(zip(new_iids, rows)):
+            if iid not in old:
+                self.tree.insert("", index, iid=iid, values=row)
+            elif old[iid] != tuple(row):
+                self.tree.item(iid, values=row)
+        self._rows = [tuple(r) for r in rows]
+        self._keys = [r[self.key_index] for r in rows]
+
+    def _update_bar(self):
+        self.btn_prev.state(["!disabled"] if self._has_prev else ["disabled"])
+        self.btn_next.state(["!disabled"] if self._has_next else ["disabled"])
+        if self._filter is not None:
+            self.lbl_page.config(text=f"{len(self._rows)} match(es)")
+        else:
+            self.lbl_page.config(text=f"Page {self.page}")
+
+    def _in_window(self, key):
+        # does `key` belong on the page currently shown?
+        if self._keys:
+            if self._has_prev and key < self._keys[0]:
+                return False
+            if self._has_next and key > self._keys[-1]:
+                return False
+            return True
+        return self.page == 1
+
+    def upsert_row(self, row):
+        """Show an added/updated row without reloading the page."""
+        row = tuple(row)
+        key = row[self.key_index]
+        index = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            self._rows[index] = row
+            self.tree.item(self.iid(key), values=row)
+            return
+        if self._filter is not None or not self._in_window(key):
+            return
+        self._rows.insert(index, row)
+        self._keys.insert(index, key)
+        self.tree.insert("", index, iid=self.iid(key), values=row)
+        if len(self._rows) > self.page_size:
+            # the last row now belongs to the next page
+            self._rows.pop()
+            self.tree.delete(self.iid(self._keys.pop()))
+            self._has_next = True
+            self._update_bar()
+
+    def remove_row(self, key):
+        """Drop a deleted row without reloading the page."""
+        index = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._rows[index], self._keys[index]
+            self.tree.delete(self.iid(key))
+
+    def watch(self, version_fn, interval_ms=3000):
+        """Reconcile with the database when `version_fn()` changes.
+
+        Meant for PRAGMA data_version (database.data_version), which changes
+        whenever another connection commits, so writes from other windows
+        or processes show up. The reload is a diff, so it does no widget
+        work when the page already matches.
+        """
+        last = version_fn()
+
+        def tick():
+            nonlocal last
+            if not self.winfo_exists():
+                return
+            version = version_fn()
+            if version != last:
+                last = version
+                self.refresh()
+            self.after(interval_ms, tick)
+
+        self.after(interval_ms, tick)
+
+    def first_page(self):
+        self._load(1)
+
+    def next_page(self):
+        if self._rows:
+            self._load(self.page + 1, after=self._keys[-1])
+
+    def prev_page(self):
+        if self.page > 2 and self._rows:
+            self._load(self.page - 1, before=self._keys[0])
+        elif self.page == 2:
+            self._load(1)
+
+    def refresh(self):
+        # reload the current window as a diff (e.g. after an external write)
+        self._load(self.page, **self._cursor)
+
+    def set_filter(self, fetch=None):
+        """Show `fetch(limit=...)` (e.g. search results, ascending by key)
+        instead of the paged query; None goes back to page 1."""
+        self._filter = fetch
+        self._load(1)
+
+
+class SearchBox(ttk.Frame):
+    """Label + Entry calling `on_search(text)` once typing pauses for `delay_ms`."""
+
+    def __init__(self, master, on_search, delay_ms=250, label="Search:", **kw):
+        super().__init__(master, **kw)
+        self.on_search = on_search
+        self.delay_ms = delay_ms
+        self._pending = None
+        self._last = ""
+        ttk.Label(self, text=label).pack(side="left")
+        self.var = tk.StringVar()
+        self.entry = ttk.Entry(self, textvariable=self.var)
+        self.entry.pack(side="left", fill="x", expand=True, padx=6)
+        self.var.trace_add("write", lambda *a: self._schedule())
+        self.entry.bind("<Escape>", lambda e: self.var.set(""))
+
+    def _schedule(self):
+        # debounce: restart the timer on every keystroke
+        if self._pending is not None:
+            self.after_cancel(self._pending)
+        self._pending = self.after(self.delay_ms, self._fire)
+
+    def _fire(self):
+        self._pending = None
+        text = self.var.get().strip()
+        if text != self._last:
+            self._last = text
+            self.on_search(text)